@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .querycache import install_write_tracking
+        connection_created.connect(install_write_tracking)
+        for connection in connections.all():
+            install_write_tracking(connection)
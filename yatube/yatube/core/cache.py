@@ -0,0 +1,121 @@
+"""Кэш целых страниц.
+
+Тело страницы одно для всех посетителей: то, что зависит от
+пользователя, выносится в фрагменты core.fragments и вставляется
+после чтения из кэша.
+
+Запись хранит готовый ответ вместе со сроком свежести и версией
+контента. Устаревшую запись перестраивает только один процесс —
+тот, кто успел взять блокировку через cache.add; остальные в это
+время получают старую страницу. Если записи нет совсем, запросы
+без блокировки недолго ждут, пока её построит владелец блокировки.
+"""
+import hashlib
+from functools import wraps
+from time import monotonic, sleep, time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PAGE_CACHE_TIMEOUT: int = 20
+PAGE_CACHE_STALE: int = 5 * 60
+PAGE_LOCK_TIMEOUT: int = 10
+PAGE_LOCK_WAIT: float = 0.5
+PAGE_LOCK_POLL: float = 0.05
+CACHE_HEADER = 'X-Page-Cache'
+
+
+def page_cache_key(request, key_prefix):
+    """GET и HEAD одного адреса читают одну запись."""
+    path = request.get_full_path().encode()
+    return f'page:{key_prefix}:{hashlib.md5(path).hexdigest()}'
+
+
+def is_cacheable(request, response):
+    """В кэш попадают только обычные ответы 200 без cookie."""
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def cached_response(entry, status):
+    _, _, content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response[CACHE_HEADER] = status
+    return response
+
+
+def wait_for_entry(key):
+    """Ждёт, пока запись построит процесс, взявший блокировку."""
+    deadline = monotonic() + PAGE_LOCK_WAIT
+    while monotonic() < deadline:
+        sleep(PAGE_LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def lookup(key, lock, current):
+    """Ответ из кэша и признак того, что блокировку взял этот процесс.
+
+    Без ответа и без блокировки страница строится в обход кэша:
+    владелец блокировки не успел её построить.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, entry_version, _, _ = entry
+        if fresh_until > time() and entry_version == current:
+            return cached_response(entry, 'HIT'), False
+        if not cache.add(lock, True, PAGE_LOCK_TIMEOUT):
+            return cached_response(entry, 'STALE'), False
+        return None, True
+    if cache.add(lock, True, PAGE_LOCK_TIMEOUT):
+        return None, True
+    entry = wait_for_entry(key)
+    if entry is not None:
+        return cached_response(entry, 'HIT'), False
+    return None, False
+
+
+def page_cache(timeout=PAGE_CACHE_TIMEOUT, key_prefix='page', version=None):
+    """Кэширует страницу для GET и HEAD запросов.
+
+    Шаблон страницы не должен зависеть от пользователя: всё
+    персональное выносится в {% fragment %}.
+
+    version — функция, возвращающая текущую версию контента: запись
+    другой версии считается устаревшей раньше срока.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, key_prefix)
+            lock = f'{key}:lock'
+            current = version() if version else None
+            response, locked = lookup(key, lock, current)
+            if response is not None:
+                return response
+            if not locked:
+                return view(request, *args, **kwargs)
+            try:
+                response = view(request, *args, **kwargs)
+                if is_cacheable(request, response):
+                    entry = (
+                        time() + timeout,
+                        current,
+                        response.content,
+                        response['Content-Type'],
+                    )
+                    cache.set(key, entry, timeout + PAGE_CACHE_STALE)
+            finally:
+                cache.delete(lock)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+        return wrapper
+    return decorator
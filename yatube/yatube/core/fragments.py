@@ -0,0 +1,105 @@
+"""Персональные фрагменты поверх общего кэшированного тела страницы.
+
+Тег {% fragment %} оставляет в разметке заглушку вместо того, что
+зависит от пользователя. Тело страницы с заглушками одно на всех и
+кэшируется целиком; FragmentMiddleware уже после кэша заменяет
+заглушки фрагментами, отрисованными для текущего запроса, — как
+edge-side includes, только внутри Django.
+
+Пакетный фрагмент (batch=True) получает параметры всех своих заглушек
+на странице сразу, чтобы, например, прочитать состояние всех постов
+ленты одним запросом, а не по запросу на пост.
+"""
+import base64
+import json
+import re
+from collections import defaultdict
+
+from django.template.loader import render_to_string
+
+PLACEHOLDER_MARK = b'<!--fragment:'
+PLACEHOLDER = re.compile(r'<!--fragment:([\w.]+):([\w=-]*)-->')
+
+_registry = {}
+
+
+def register(name, template_name, batch=False):
+    """Регистрирует фрагмент: функция получает запрос и параметры
+    заглушки и возвращает контекст для шаблона фрагмента.
+
+    Функция пакетного фрагмента получает запрос и список параметров
+    всех заглушек страницы и возвращает список контекстов.
+    """
+    def decorator(func):
+        _registry[name] = (template_name, func, batch)
+        return func
+    return decorator
+
+
+def placeholder(name, **params):
+    if name not in _registry:
+        raise KeyError(f'Фрагмент {name} не зарегистрирован')
+    payload = base64.urlsafe_b64encode(json.dumps(params).encode())
+    return f'<!--fragment:{name}:{payload.decode()}-->'
+
+
+def render_fragments(request, name, params_list):
+    """Разметка фрагмента для каждого набора параметров."""
+    template_name, func, batch = _registry[name]
+    if batch:
+        contexts = func(request, params_list)
+    else:
+        contexts = [func(request, **params) for params in params_list]
+    return [
+        render_to_string(template_name, context, request=request)
+        for context in contexts
+    ]
+
+
+def splice(request, content):
+    """Заменяет заглушки в готовой разметке фрагментами запроса."""
+    matches = list(PLACEHOLDER.finditer(content))
+    positions = defaultdict(list)
+    for position, match in enumerate(matches):
+        positions[match.group(1)].append(position)
+    rendered = [None] * len(matches)
+    for name, indexes in positions.items():
+        params_list = [
+            json.loads(base64.urlsafe_b64decode(matches[i].group(2)))
+            for i in indexes
+        ]
+        for i, html in zip(
+            indexes, render_fragments(request, name, params_list)
+        ):
+            rendered[i] = html
+    parts, last = [], 0
+    for match, html in zip(matches, rendered):
+        parts += [content[last:match.start()], html]
+        last = match.end()
+    parts.append(content[last:])
+    return ''.join(parts)
+
+
+class FragmentMiddleware:
+    """Вставляет персональные фрагменты в HTML-ответы с заглушками."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming
+                or 'text/html' not in response.get('Content-Type', '')
+                or PLACEHOLDER_MARK not in response.content):
+            return response
+        charset = response.charset
+        response.content = splice(
+            request, response.content.decode(charset)
+        ).encode(charset)
+        return response
+
+
+@register('nav', 'includes/nav.html')
+def nav(request):
+    """Меню шапки: пункты зависят от того, вошёл ли пользователь."""
+    return {}
@@ -0,0 +1,45 @@
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import RequestFactory
+
+from core.warmup import iter_template_names
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время компиляции и рендера шаблонов проекта.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'templates',
+            nargs='*',
+            help='Имена шаблонов; по умолчанию все шаблоны проекта.'
+        )
+        parser.add_argument('--repeat', type=int, default=100)
+
+    def handle(self, *args, **options):
+        engine = engines['django']
+        repeat = options['repeat']
+        names = options['templates'] or list(
+            iter_template_names(project_only=True)
+        )
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        for name in names:
+            start = perf_counter()
+            template = engine.get_template(name)
+            compile_ms = (perf_counter() - start) * 1000
+            try:
+                start = perf_counter()
+                for _ in range(repeat):
+                    template.render(request=request)
+                render_ms = (perf_counter() - start) * 1000 / repeat
+            except Exception as error:
+                self.stdout.write(f'{name}: ошибка рендера ({error})')
+                continue
+            self.stdout.write(
+                f'{name}: загрузка {compile_ms:.2f} мс, '
+                f'рендер {render_ms:.3f} мс'
+            )
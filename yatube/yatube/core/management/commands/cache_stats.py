@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.objectcache import registered_caches
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша объектов по моделям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true', help='Обнулить счётчики.'
+        )
+
+    def handle(self, *args, **options):
+        for label, model_cache in sorted(registered_caches().items()):
+            stats = model_cache.stats()
+            total = stats['hits'] + stats['misses']
+            ratio = stats['hits'] / total * 100 if total else 0
+            self.stdout.write(
+                f'{label}: попаданий {stats["hits"]}, '
+                f'промахов {stats["misses"]}, доля попаданий {ratio:.1f}%'
+            )
+            if options['reset']:
+                model_cache.reset_stats()
@@ -0,0 +1,140 @@
+"""Сквозной кэш объектов моделей по первичному ключу.
+
+Объект хранится один раз под ключом pk. Дополнительные уникальные
+поля (slug, username) ведут на pk через отдельные ключи-указатели,
+поэтому смена slug не оставляет в кэше копий объекта: указатель
+со старым значением просто перестаёт совпадать с объектом. Записи
+сбрасываются сигналами post_save и post_delete, а счётчики попаданий
+и промахов лежат в том же кэше и видны всем процессам. Поля из
+exclude в кэш не попадают: объект хранится с отложенными полями,
+и обращение к ним читает значение из базы.
+"""
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+OBJECT_CACHE_TIMEOUT: int = 60 * 60
+
+_registry = {}
+
+
+class ModelCache:
+    def __init__(self, model, lookups=(), timeout=OBJECT_CACHE_TIMEOUT,
+                 exclude=()):
+        self.model = model
+        self.lookups = tuple(lookups)
+        self.exclude = tuple(exclude)
+        self.timeout = timeout
+        self.prefix = f'object:{model._meta.label_lower}'
+        _registry[model._meta.label_lower] = self
+        post_save.connect(self.on_change, sender=model, weak=False)
+        post_delete.connect(self.on_change, sender=model, weak=False)
+
+    def queryset(self):
+        queryset = self.model._default_manager.all()
+        if self.exclude:
+            queryset = queryset.defer(*self.exclude)
+        return queryset
+
+    def key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def lookup_key(self, field, value):
+        return f'{self.prefix}:{field}:{value}'
+
+    def count(self, name, delta=1):
+        if not delta:
+            return
+        key = f'{self.prefix}:{name}'
+        if not cache.add(key, delta, None):
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                cache.add(key, delta, None)
+
+    def stats(self):
+        hits = cache.get(f'{self.prefix}:hits', 0)
+        misses = cache.get(f'{self.prefix}:misses', 0)
+        return {'hits': hits, 'misses': misses}
+
+    def reset_stats(self):
+        cache.delete_many([f'{self.prefix}:hits', f'{self.prefix}:misses'])
+
+    def get(self, pk=None, **lookup):
+        """Объект по pk или по одному из полей lookups.
+
+        Как и QuerySet.get, при отсутствии объекта поднимает
+        model.DoesNotExist.
+        """
+        if pk is not None:
+            try:
+                pk = self.model._meta.pk.to_python(pk)
+            except ValidationError:
+                raise self.model.DoesNotExist(
+                    f'{self.model._meta.object_name} {pk!r}: неверный pk'
+                )
+            obj = self.get_many([pk]).get(pk)
+            if obj is None:
+                raise self.model.DoesNotExist(
+                    f'{self.model._meta.object_name} {pk} не найден'
+                )
+            return obj
+        (field, value), = lookup.items()
+        if field not in self.lookups:
+            raise ValueError(f'{field} не входит в lookups {self.prefix}')
+        key = self.lookup_key(field, value)
+        pk = cache.get(key)
+        if pk is not None:
+            obj = self.get_many([pk]).get(pk)
+            if obj is not None and getattr(obj, field) == value:
+                return obj
+            cache.delete(key)
+        self.count('misses')
+        obj = self.queryset().get(**{field: value})
+        cache.set(key, obj.pk, self.timeout)
+        cache.set(self.key(obj.pk), obj, self.timeout)
+        return obj
+
+    def get_or_404(self, pk=None, **lookup):
+        try:
+            return self.get(pk, **lookup)
+        except self.model.DoesNotExist:
+            raise Http404(
+                f'{self.model._meta.object_name} не найден'
+            )
+
+    def get_many(self, pks):
+        """Объекты по списку pk: промахи дочитываются одним запросом.
+
+        Возвращает словарь {pk: объект}; отсутствующих в базе pk
+        в нём нет.
+        """
+        pks = [self.model._meta.pk.to_python(pk) for pk in pks]
+        found = cache.get_many([self.key(pk) for pk in pks])
+        objects = {obj.pk: obj for obj in found.values()}
+        missing = [pk for pk in pks if pk not in objects]
+        self.count('hits', len(objects))
+        if missing:
+            self.count('misses', len(missing))
+            loaded = self.queryset().in_bulk(missing)
+            cache.set_many(
+                {self.key(pk): obj for pk, obj in loaded.items()},
+                self.timeout,
+            )
+            objects.update(loaded)
+        return objects
+
+    def invalidate(self, *pks):
+        cache.delete_many([self.key(pk) for pk in pks])
+
+    def on_change(self, sender, instance, **kwargs):
+        self.invalidate(instance.pk)
+        cache.delete_many([
+            self.lookup_key(field, getattr(instance, field))
+            for field in self.lookups
+        ])
+
+
+def registered_caches():
+    return dict(_registry)
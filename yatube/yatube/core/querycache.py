@@ -0,0 +1,157 @@
+"""Кэш результатов запросов ORM с поколениями таблиц.
+
+Ключ запроса — отпечаток скомпилированного SQL с параметрами плюс
+текущие номера поколений всех таблиц, которые в этом SQL упомянуты.
+Любой INSERT, UPDATE или DELETE, прошедший через соединение Django,
+увеличивает поколение своей таблицы, и старые ключи просто перестают
+запрашиваться — ручная инвалидация не нужна.
+
+Кэш включается явно: для одного QuerySet через .cache() или для
+всех кэширующих QuerySet внутри представления через use_query_cache.
+"""
+import contextvars
+import hashlib
+import re
+from functools import lru_cache, wraps
+from time import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import models, transaction
+
+QUERY_CACHE_TIMEOUT: int = 60
+WRITE = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?',
+    re.IGNORECASE,
+)
+QUOTED_NAME = re.compile(r'"(\w+)"')
+
+_view_enabled = contextvars.ContextVar('query_cache', default=False)
+
+
+@lru_cache(maxsize=None)
+def model_tables():
+    return frozenset(model._meta.db_table for model in apps.get_models())
+
+
+def generation_key(table):
+    return f'query:table:{table}'
+
+
+def table_generations(tables):
+    """Номера поколений таблиц. Пропавший из кэша счётчик начинается
+    с текущего времени, чтобы не совпасть с уже выданными номерами."""
+    keys = [generation_key(table) for table in tables]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, int(time() * 1000), None)
+            generations[key] = cache.get(key)
+    return tuple(generations[key] for key in keys)
+
+
+def bump_table(table):
+    try:
+        cache.incr(generation_key(table))
+    except ValueError:
+        cache.add(generation_key(table), int(time() * 1000), None)
+
+
+def track_writes(execute, sql, params, many, context):
+    """Обёртка execute: запись в таблицу меняет её поколение сразу
+    и ещё раз после коммита, чтобы соседний процесс не закэшировал
+    данные, прочитанные до коммита."""
+    result = execute(sql, params, many, context)
+    match = WRITE.match(sql)
+    if match and match.group(1) in model_tables():
+        table = match.group(1)
+        bump_table(table)
+        connection = context['connection']
+        if connection.in_atomic_block:
+            transaction.on_commit(
+                lambda: bump_table(table), using=connection.alias
+            )
+    return result
+
+
+def install_write_tracking(connection, **kwargs):
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+def use_query_cache(view):
+    """Включает кэш для всех кэширующих QuerySet внутри представления."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _view_enabled.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _view_enabled.reset(token)
+    return wrapper
+
+
+class CachingQuerySet(models.QuerySet):
+    """QuerySet, результаты и count() которого можно кэшировать."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_timeout = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_timeout = self._cache_timeout
+        return clone
+
+    def cache(self, timeout=QUERY_CACHE_TIMEOUT):
+        clone = self._chain()
+        clone._cache_timeout = timeout
+        return clone
+
+    def nocache(self):
+        clone = self._chain()
+        clone._cache_timeout = 0
+        return clone
+
+    def _query_cache_timeout(self):
+        if self._cache_timeout is None:
+            return QUERY_CACHE_TIMEOUT if _view_enabled.get() else 0
+        return self._cache_timeout
+
+    def _query_cache_key(self, kind):
+        """Ключ запроса или None, если SQL заведомо пустой."""
+        try:
+            sql, params = self.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+        tables = sorted(model_tables().intersection(QUOTED_NAME.findall(sql)))
+        fingerprint = hashlib.md5(
+            f'{self.db}|{kind}|{sql}|{params!r}'.encode()
+        ).hexdigest()
+        generations = '.'.join(map(str, table_generations(tables)))
+        return f'query:{fingerprint}:{generations}'
+
+    def _fetch_all(self):
+        timeout = self._query_cache_timeout()
+        if self._result_cache is None and timeout:
+            key = self._query_cache_key(self._iterable_class.__name__)
+            if key is not None:
+                self._result_cache = cache.get(key)
+                if self._result_cache is None:
+                    self._result_cache = list(self._iterable_class(self))
+                    cache.set(key, self._result_cache, timeout)
+        super()._fetch_all()
+
+    def count(self):
+        timeout = self._query_cache_timeout()
+        if self._result_cache is not None or not timeout:
+            return super().count()
+        key = self._query_cache_key('count')
+        if key is None:
+            return 0
+        count = cache.get(key)
+        if count is None:
+            count = super().count()
+            cache.set(key, count, timeout)
+        return count
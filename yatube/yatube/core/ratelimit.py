@@ -0,0 +1,142 @@
+"""Ограничение частоты запросов к пишущим представлениям и входу.
+
+Вместо ведра токенов со временем последнего пополнения, которое
+нельзя атомарно обновить через API кэша Django, используется
+скользящее окно из двух счётчиков: текущего и предыдущего окна.
+Оценка числа запросов за последний период — взвешенная сумма этих
+счётчиков; как и ведро, она допускает короткий всплеск и плавно
+восстанавливается. Счётчики увеличиваются атомарным incr, а отказ
+стоит одного чтения из кэша и не касается базы.
+"""
+import threading
+from functools import lru_cache, wraps
+from math import ceil
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+class CacheStore:
+    """Счётчики в кэше default. Общие для всех процессов они только
+    при общем кэше (memcached в prod); с LocMemCache каждый процесс
+    считает свои запросы, и предел фактически умножается на число
+    процессов."""
+
+    def get_many(self, keys):
+        return cache.get_many(keys)
+
+    def incr(self, key, timeout):
+        if not cache.add(key, 1, timeout):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 1, timeout)
+
+
+class LocalStore:
+    """Счётчики в памяти процесса — для тестов и одиночного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def get_many(self, keys):
+        now = time()
+        with self.lock:
+            return {
+                key: self.counters[key][0] for key in keys
+                if key in self.counters and self.counters[key][1] > now
+            }
+
+    def incr(self, key, timeout):
+        now = time()
+        with self.lock:
+            count, expires = self.counters.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            self.counters[key] = (count + 1, expires)
+
+
+@lru_cache(maxsize=None)
+def get_store(path):
+    return import_string(path)()
+
+
+def parse_rate(rate):
+    """'10/m' → (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request):
+    """Адрес клиента.
+
+    За обратным прокси REMOTE_ADDR — адрес самого прокси, поэтому
+    адрес берётся из заголовка RATELIMIT_CLIENT_IP_HEADER. Каждый из
+    RATELIMIT_PROXY_COUNT доверенных прокси дописывает адрес справа,
+    и клиентом считается адрес на этом месте с конца: всё левее
+    клиент мог подставить сам.
+    """
+    header = settings.RATELIMIT_CLIENT_IP_HEADER
+    if header and header in request.META:
+        addresses = [
+            address.strip() for address in request.META[header].split(',')
+        ]
+        count = settings.RATELIMIT_PROXY_COUNT
+        if count <= len(addresses) and addresses[-count]:
+            return addresses[-count]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request, key):
+    if key == 'user_or_ip' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def hit(store, name, limit, period, now=None):
+    """Учитывает запрос; возвращает 0 или число секунд до повтора."""
+    now = time() if now is None else now
+    window, elapsed = divmod(now, period)
+    current_key = f'ratelimit:{name}:{int(window)}'
+    previous_key = f'ratelimit:{name}:{int(window) - 1}'
+    counts = store.get_many([previous_key, current_key])
+    previous = counts.get(previous_key, 0)
+    current = counts.get(current_key, 0)
+    weight = (period - elapsed) / period
+    if previous * weight + current >= limit:
+        if current >= limit or not previous:
+            return max(1, ceil(period - elapsed))
+        wait = period - elapsed - (limit - current) * period / previous
+        return max(1, ceil(wait))
+    store.incr(current_key, 2 * period)
+    return 0
+
+
+def ratelimit(rate, key='user_or_ip', methods=('POST',), scope=None):
+    """Не больше rate запросов (например '10/m') с одного пользователя
+    или, для анонимов и key='ip', с одного IP; иначе ответ 429."""
+    limit, period = parse_rate(rate)
+
+    def decorator(view):
+        name = scope or f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and request.method in methods:
+                store = get_store(settings.RATELIMIT_STORE)
+                retry_after = hit(
+                    store, f'{name}:{client_key(request, key)}',
+                    limit, period,
+                )
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
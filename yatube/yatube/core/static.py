@@ -0,0 +1,140 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=60'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE: int = 64 * 1024
+
+
+def parse_accept_encoding(header):
+    """Кодировки из Accept-Encoding с их q: {'gzip': 1.0, 'br': 0.0}."""
+    weights = {}
+    for item in header.split(','):
+        name, *params = item.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def etag_matches(header, etag):
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+def read_chunks(file):
+    with file:
+        yield from iter(lambda: file.read(CHUNK_SIZE), b'')
+
+
+class StaticFile:
+    def __init__(self, name, path):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        version = f'{int(stat.st_mtime):x}-{stat.st_size:x}'
+        self.etag = f'"{version}"'
+        self.content_type = (
+            mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        )
+        self.cache_control = (
+            IMMUTABLE if HASHED_NAME.search(name) else SHORT_LIVED
+        )
+        # У каждой сжатой копии свой ETag: это другое представление
+        # того же файла, и кэши не должны подменять одно другим.
+        self.variants = [
+            (encoding, path + suffix, os.path.getsize(path + suffix),
+             f'"{version}-{encoding}"')
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+
+    def choose(self, accept_encoding):
+        """Сжатая копия с наибольшим q из Accept-Encoding; при равных
+        q — в порядке ENCODINGS. Кодировки с q=0 не отдаются."""
+        weights = parse_accept_encoding(accept_encoding)
+        best = None
+        for variant in self.variants:
+            weight = weights.get(variant[0], weights.get('*', 0))
+            if weight > 0 and (best is None or weight > best[0]):
+                best = (weight, variant)
+        if best is None:
+            return None, self.path, self.size, self.etag
+        return best[1]
+
+
+class StaticFilesApplication:
+    """WSGI-обёртка, которая сама отдаёт собранную статику.
+
+    Список файлов читается один раз при старте; для файлов
+    с хэшем в имени выставляются «вечные» заголовки кэширования,
+    а сжатые копии .br/.gz отдаются по Accept-Encoding.
+    """
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.prefix = '/' + prefix.strip('/') + '/'
+        self.files = self.scan(root)
+
+    @staticmethod
+    def scan(root):
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                files[name] = StaticFile(name, path)
+        return files
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        static_file = None
+        if path.startswith(self.prefix):
+            static_file = self.files.get(path[len(self.prefix):])
+        if static_file is None:
+            return self.application(environ, start_response)
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD')])
+            return []
+        encoding, file_path, size, etag = static_file.choose(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        headers = [
+            ('Cache-Control', static_file.cache_control),
+            ('ETag', etag),
+            ('Last-Modified', static_file.last_modified),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if etag_matches(environ.get('HTTP_IF_NONE_MATCH', ''), etag):
+            start_response('304 Not Modified', headers)
+            return []
+        headers += [
+            ('Content-Type', static_file.content_type),
+            ('Content-Length', str(size)),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(file_path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(file, CHUNK_SIZE)
+        return read_chunks(file)
@@ -1,4 +1,20 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .cache import CACHE_HEADER, page_cache, page_cache_key
+from .hll import HyperLogLog
+from .ratelimit import LocalStore, client_ip, get_store, hit
+from .static import IMMUTABLE, StaticFilesApplication
+from .warmup import iter_template_names, warm_templates
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +22,226 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.version = 1
+
+        @page_cache(key_prefix='test', version=lambda: self.version)
+        def view(request):
+            self.calls += 1
+            return HttpResponse(f'render {self.calls}')
+
+        self.view = view
+
+    def get(self, path='/page/', user=None):
+        request = RequestFactory().get(path)
+        request.user = user or AnonymousUser()
+        return self.view(request)
+
+    def test_anonymous_pages_are_cached_by_path_and_query(self):
+        self.assertEqual(self.get()[CACHE_HEADER], 'MISS')
+        response = self.get()
+        self.assertEqual(response[CACHE_HEADER], 'HIT')
+        self.assertEqual(response.content, b'render 1')
+        self.get('/page/?page=2')
+        self.assertEqual(self.calls, 2)
+
+    def test_authenticated_users_share_cached_body(self):
+        self.get()
+        user = get_user_model().objects.create_user(username='user')
+        self.assertEqual(self.get(user=user)[CACHE_HEADER], 'HIT')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_served_while_lock_is_held(self):
+        self.get()
+        self.version = 2
+        key = page_cache_key(RequestFactory().get('/page/'), 'test')
+        cache.add(f'{key}:lock', True)
+        response = self.get()
+        self.assertEqual(response[CACHE_HEADER], 'STALE')
+        self.assertEqual(response.content, b'render 1')
+        cache.delete(f'{key}:lock')
+        self.assertEqual(self.get().content, b'render 2')
+
+
+class RateLimitTests(TestCase):
+    def test_window_rejects_over_limit_and_recovers(self):
+        store = LocalStore()
+        for _ in range(3):
+            self.assertEqual(hit(store, 'test', 3, 60, now=600), 0)
+        self.assertEqual(hit(store, 'test', 3, 60, now=610), 50)
+        # В следующем окне прошлые запросы учитываются с убывающим весом.
+        self.assertEqual(hit(store, 'test', 3, 60, now=665), 0)
+        self.assertEqual(hit(store, 'test', 3, 60, now=670), 10)
+        self.assertEqual(hit(store, 'test', 3, 60, now=681), 0)
+
+    @override_settings(RATELIMIT_ENABLED=True)
+    def test_login_is_limited_per_ip_without_database(self):
+        get_store.cache_clear()
+        url = reverse('users:login')
+        data = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(10):
+            self.assertEqual(self.client.post(url, data).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(RATELIMIT_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR',
+                       RATELIMIT_PROXY_COUNT=1)
+    def test_client_ip_from_trusted_proxy(self):
+        factory = RequestFactory()
+        request = factory.get(
+            '/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4',
+            REMOTE_ADDR='10.0.0.1',
+        )
+        self.assertEqual(client_ip(request), '1.2.3.4')
+        request = factory.get('/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with self.settings(RATELIMIT_CLIENT_IP_HEADER=None):
+            request = factory.get(
+                '/', HTTP_X_FORWARDED_FOR='1.2.3.4', REMOTE_ADDR='10.0.0.1'
+            )
+            self.assertEqual(client_ip(request), '10.0.0.1')
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_and_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(6000):
+            first.add(f'user:{i}')
+            second.add(f'user:{i + 3000}')
+        self.assertAlmostEqual(first.count(), 6000, delta=300)
+        restored = HyperLogLog(bytes(first))
+        self.assertEqual(restored.count(), first.count())
+        # Повторы и пересечение не увеличивают оценку.
+        self.assertAlmostEqual(restored.merge(second).count(), 9000, delta=450)
+
+    def test_small_counts_are_exact_enough(self):
+        sketch = HyperLogLog()
+        for i in range(20):
+            sketch.add(i)
+            sketch.add(i)
+        self.assertEqual(sketch.count(), 20)
+
+
+class TemplateWarmupTests(TestCase):
+    def test_project_templates_are_listed(self):
+        names = list(iter_template_names(project_only=True))
+        self.assertIn('base.html', names)
+        self.assertIn('posts/includes/paginator.html', names)
+
+    def test_warm_templates_compiles_templates(self):
+        self.assertGreater(warm_templates(project_only=True), 0)
+
+    def test_broken_template_is_logged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name, source in (('ok.html', 'ok'), ('broken.html', '{% if %}')):
+            with open(os.path.join(directory, name), 'w') as template:
+                template.write(source)
+        templates = [{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [directory],
+        }]
+        with override_settings(TEMPLATES=templates), self.assertLogs(
+            'core.warmup', 'ERROR'
+        ) as logs:
+            self.assertEqual(warm_templates(project_only=True), 1)
+        self.assertIn('broken.html', logs.output[0])
+        self.assertIn('Не скомпилировано шаблонов: 1', logs.output[-1])
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as css:
+            css.write('body { color: black; }\n' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def collect(self):
+        with override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        return [
+            name for name in os.listdir(os.path.join(self.root, 'css'))
+            if name.startswith('site.') and name.endswith('.css')
+            and name != 'site.css'
+        ][0]
+
+    def serve(self, path, **environ):
+        responses = []
+        application = StaticFilesApplication(
+            lambda environ, start_response: ['django'],
+            self.root,
+            '/static/'
+        )
+        body = application(
+            {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', **environ},
+            lambda status, headers: responses.append((status, dict(headers)))
+        )
+        return responses, b''.join(body) if responses else body
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        hashed_name = self.collect()
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.root, 'css', hashed_name + '.gz'))
+        )
+
+    def test_hashed_files_served_precompressed_and_immutable(self):
+        hashed_name = self.collect()
+        responses, body = self.serve(
+            f'/static/css/{hashed_name}', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        status, headers = responses[0]
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        self.assertEqual(len(body), int(headers['Content-Length']))
+
+    def test_refused_encodings_and_variant_etags(self):
+        hashed_name = self.collect()
+        url = f'/static/css/{hashed_name}'
+        responses, _ = self.serve(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        plain = responses[0][1]
+        self.assertNotIn('Content-Encoding', plain)
+        responses, _ = self.serve(
+            url, HTTP_ACCEPT_ENCODING='identity, gzip;q=0.5'
+        )
+        gzipped = responses[0][1]
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertNotEqual(gzipped['ETag'], plain['ETag'])
+        responses, _ = self.serve(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=plain['ETag']
+        )
+        self.assertEqual(responses[0][0], '200 OK')
+        responses, _ = self.serve(
+            url, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=gzipped['ETag'],
+        )
+        self.assertEqual(responses[0][0], '304 Not Modified')
+
+    def test_unknown_paths_passed_to_django(self):
+        self.collect()
+        responses, body = self.serve('/posts/1/')
+        self.assertEqual(responses, [])
+        self.assertEqual(body, ['django'])
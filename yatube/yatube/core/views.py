@@ -1,4 +1,6 @@
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
 
 
 def page_not_found(request, exception):
@@ -15,3 +17,13 @@ def forbidden(request, exception):
 
 def internal_server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def too_many_requests(request, retry_after):
+    """Ответ 429 без обращения к сессии и базе."""
+    response = HttpResponse(
+        render_to_string('core/429.html', {'retry_after': retry_after}),
+        status=429,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,54 @@
+import logging
+import os
+
+from django.template import (TemplateDoesNotExist, TemplateSyntaxError,
+                             engines)
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+
+def template_dirs(project_only=False):
+    """Каталоги шаблонов движка Django: DIRS и, по желанию, приложений."""
+    engine = engines['django'].engine
+    dirs = list(engine.dirs)
+    if not project_only:
+        dirs.extend(get_app_template_dirs('templates'))
+    return dirs
+
+
+def iter_template_names(project_only=False):
+    """Имена всех шаблонов в каталогах, которые видит движок."""
+    seen = set()
+    for directory in template_dirs(project_only):
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+def warm_templates(project_only=False):
+    """Компилирует шаблоны заранее, чтобы кэширующий загрузчик
+    не разбирал их на первых запросах. Возвращает число шаблонов.
+
+    Шаблоны с синтаксическими ошибками не пропускаются молча: каждый
+    пишется в журнал, а в конце — сколько их всего.
+    """
+    engine = engines['django'].engine
+    count = failed = 0
+    for name in iter_template_names(project_only):
+        try:
+            engine.get_template(name)
+        except TemplateDoesNotExist:
+            continue
+        except TemplateSyntaxError:
+            logger.exception('Шаблон %s не компилируется', name)
+            failed += 1
+            continue
+        count += 1
+    if failed:
+        logger.error('Не скомпилировано шаблонов: %d', failed)
+    return count
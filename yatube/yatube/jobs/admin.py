@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'run_at', 'attempts', 'key'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,40 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from jobs.models import Job
+from jobs.registry import enqueue
+from jobs.worker import run_pool
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость постановки и выполнения пустых задач. '
+        'Созданные задачи удаляются после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1000)
+        parser.add_argument('--processes', type=int, nargs='+',
+                            default=[1, 2, 4])
+        parser.add_argument('--batch', type=int, default=10)
+
+    def handle(self, *args, **options):
+        count = options['jobs']
+        try:
+            for processes in options['processes']:
+                with override_settings(JOBS_EAGER=False):
+                    start = perf_counter()
+                    for i in range(count):
+                        enqueue('jobs.noop', priority=i % 3)
+                    enqueued = count / (perf_counter() - start)
+                start = perf_counter()
+                run_pool(processes, once=True, batch=options['batch'])
+                done = count / (perf_counter() - start)
+                self.stdout.write(
+                    f'процессов {processes}: постановка {enqueued:.0f} '
+                    f'задач/с, выполнение {done:.0f} задач/с'
+                )
+        finally:
+            Job.objects.filter(name='jobs.noop').delete()
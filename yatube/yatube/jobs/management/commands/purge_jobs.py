@@ -0,0 +1,40 @@
+from datetime import timedelta
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет выполненные задачи старше --days дней небольшими '
+        'пачками, чтобы не держать блокировку записи SQLite. '
+        'Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7)
+        parser.add_argument('--batch', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        done = Job.objects.filter(
+            status=Job.DONE,
+            finished__lt=timezone.now() - timedelta(days=options['days']),
+        )
+        deleted = 0
+        while True:
+            pks = list(done.values_list('pk', flat=True)[:options['batch']])
+            if not pks:
+                break
+            with transaction.atomic():
+                Job.objects.filter(pk__in=pks).delete()
+            deleted += len(pks)
+            sleep(options['pause'])
+        self.stdout.write(f'Удалено задач: {deleted}')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.worker import run_pool
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+        parser.add_argument('--poll', type=float, default=1.0)
+        parser.add_argument('--batch', type=int, default=10)
+
+    def handle(self, *args, **options):
+        failed = run_pool(
+            options['processes'],
+            once=options['once'],
+            poll=options['poll'],
+            batch=options['batch'],
+        )
+        if failed:
+            raise CommandError(f'Воркеров завершилось с ошибкой: {failed}')
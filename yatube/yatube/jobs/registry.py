@@ -0,0 +1,86 @@
+"""Реестр задач и постановка в очередь.
+
+Задача — обычная функция с именованными аргументами, которые
+сериализуются в JSON. Модули tasks.py всех приложений импортируются
+при старте (JobsConfig.ready), так что воркер знает все задачи.
+
+    @task(priority=5)
+    def send_email(subject, body, to): ...
+
+    enqueue(send_email, key=f'reset:{user.pk}', subject=..., ...)
+
+При JOBS_EAGER задача выполняется сразу в вызывающем процессе — так
+удобнее в тестах и при разработке без запущенного runworker. Ошибка
+при этом обрабатывается как в воркере: пишется в журнал и в запись
+задачи, которая остаётся в очереди на повтор.
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+_registry = {}
+
+
+class Task:
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **kwargs):
+        return enqueue(self, **kwargs)
+
+
+def task(name=None, priority=0, max_attempts=5):
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _registry[task_name] = Task(func, task_name, priority, max_attempts)
+        return _registry[task_name]
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def enqueue(task, key=None, priority=None, delay=0, **kwargs):
+    """Ставит задачу в очередь и возвращает Job.
+
+    С ключом key задача ставится не больше одного раза: повторный
+    вызов вернёт уже существующую запись.
+    """
+    if isinstance(task, str):
+        task = get_task(task)
+    job = Job(
+        name=task.name,
+        payload=json.dumps(kwargs),
+        key=key,
+        priority=task.priority if priority is None else priority,
+        max_attempts=task.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+    else:
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            return Job.objects.get(key=key)
+    if settings.JOBS_EAGER:
+        from .worker import run_job
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=1, locked_at=timezone.now()
+        )
+        job.refresh_from_db()
+        run_job(job)
+    return job
@@ -0,0 +1,6 @@
+from .registry import task
+
+
+@task(name='jobs.noop')
+def noop(**kwargs):
+    """Пустая задача для замеров пропускной способности очереди."""
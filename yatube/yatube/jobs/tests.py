@@ -0,0 +1,216 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.cache import User
+
+from .models import Job
+from .registry import enqueue, task
+from . import worker
+from .worker import claim, retry_delay, run_job, run_pool, work
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('сломано')
+
+
+@override_settings(JOBS_EAGER=False)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key_enqueues_once(self):
+        first = enqueue(record, key='once', value=1)
+        second = enqueue(record, key='once', value=2)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(work(once=True), 1)
+        self.assertEqual(calls, [1])
+
+    def test_jobs_run_by_priority(self):
+        enqueue(record, value='low')
+        enqueue(record, priority=5, value='high')
+        work(once=True, batch=1)
+        self.assertEqual(calls, ['high', 'low'])
+
+    def test_claimed_job_is_not_claimed_again(self):
+        enqueue(record, value=1)
+        self.assertEqual(len(claim()), 1)
+        self.assertEqual(claim(), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = enqueue(broken)
+        work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('сломано', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(retry_delay(2), 2 * retry_delay(1))
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @mock.patch('jobs.worker.close_old_connections')
+    @mock.patch('jobs.worker.JOB_DB_BACKOFF', 0)
+    def test_database_error_does_not_stop_worker(self, close):
+        enqueue(record, value=1)
+        errors = [DatabaseError('database is locked')]
+
+        def flaky_claim(batch):
+            if errors:
+                raise errors.pop()
+            return claim(batch)
+
+        with mock.patch('jobs.worker.claim', flaky_claim):
+            self.assertEqual(work(once=True), 1)
+        self.assertEqual(calls, [1])
+        close.assert_called_once_with()
+
+    @mock.patch('jobs.worker.sleep')
+    @mock.patch('jobs.worker.close_old_connections')
+    def test_status_update_is_retried(self, close, sleep):
+        job = enqueue(record, value=1)
+        [job] = claim()
+        update = QuerySet.update
+        errors = [DatabaseError('database is locked')]
+
+        def flaky_update(queryset, **kwargs):
+            if errors:
+                raise errors.pop()
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', flaky_update):
+            self.assertTrue(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        sleep.assert_called_once_with(worker.db_backoff(1))
+
+    def test_stop_request_finishes_current_job(self):
+        enqueue(record, value=1)
+        enqueue(record, value=2)
+
+        def record_and_stop(value):
+            calls.append(value)
+            worker.request_stop()
+
+        try:
+            with mock.patch('jobs.worker.get_task', lambda _: record_and_stop):
+                self.assertEqual(work(batch=2), 1)
+        finally:
+            worker._stopping.clear()
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 1)
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING).count(), 1)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        job = enqueue(record, value=1)
+        job.refresh_from_db()
+        self.assertEqual(calls, [1])
+        self.assertEqual(job.status, Job.DONE)
+
+
+class FakeProcess:
+    exitcodes = []
+
+    def __init__(self, target, args):
+        self.pid = len(self.exitcodes)
+        self.exitcode = self.exitcodes.pop()
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return False
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+@mock.patch('jobs.worker.POOL_CHECK_INTERVAL', 0)
+@mock.patch('jobs.worker.connections')
+@mock.patch('jobs.worker.signal.signal')
+@mock.patch('jobs.worker.Process', FakeProcess)
+class WorkerPoolTests(TestCase):
+    def test_once_reports_failed_workers(self, *mocks):
+        FakeProcess.exitcodes = [0, 1]
+        self.assertEqual(run_pool(2, once=True), 1)
+
+    def test_dead_worker_is_restarted(self, *mocks):
+        FakeProcess.exitcodes = [0, 0, 0, -9]
+
+        def stop_when_done(timeout):
+            if not FakeProcess.exitcodes:
+                worker._stopping.set()
+            return worker._stopping.is_set()
+
+        with mock.patch.object(worker._stopping, 'wait', stop_when_done):
+            run_pool(2)
+        worker._stopping.clear()
+        self.assertEqual(FakeProcess.exitcodes, [])
+
+
+@override_settings(JOBS_EAGER=False)
+class PasswordResetJobTests(TestCase):
+    def test_reset_email_is_sent_by_worker(self):
+        User.objects.create_user(
+            username='reader', email='r@example.com', password='secret'
+        )
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'r@example.com'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get(name='users.tasks.send_password_reset')
+        self.assertNotIn('token', job.payload)
+        self.assertNotIn('/reset/', job.payload)
+        work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['r@example.com'])
+        self.assertIn('/reset/', mail.outbox[0].body)
+
+
+class PurgeJobsTests(TestCase):
+    def test_only_old_done_jobs_are_deleted(self):
+        """Команда удаляет пачками только давно выполненные задачи."""
+        now = timezone.now()
+        for i in range(3):
+            Job.objects.create(
+                name='jobs.noop', payload='{}', status=Job.DONE,
+                run_at=now, finished=now - timedelta(days=8),
+            )
+        recent = Job.objects.create(
+            name='jobs.noop', payload='{}', status=Job.DONE,
+            run_at=now, finished=now,
+        )
+        failed = Job.objects.create(
+            name='jobs.noop', payload='{}', status=Job.FAILED,
+            run_at=now, finished=now - timedelta(days=8),
+        )
+        out = StringIO()
+        call_command('purge_jobs', '--batch', '2', '--pause', '0',
+                     stdout=out)
+        self.assertIn('Удалено задач: 3', out.getvalue())
+        self.assertEqual(
+            set(Job.objects.values_list('pk', flat=True)),
+            {recent.pk, failed.pk},
+        )
@@ -0,0 +1,210 @@
+"""Воркер очереди задач.
+
+Воркер выбирает из таблицы готовые задачи по приоритету и времени,
+а забирает каждую условным UPDATE: строку, которую успел забрать
+другой процесс, он просто пропускает. Задача, чей процесс умер
+посреди работы, снова становится доступной через JOB_LOCK_TIMEOUT.
+Неудачная попытка откладывает задачу с экспоненциальной паузой.
+
+Ошибка базы («database is locked») не убивает воркер: он закрывает
+соединение, ждёт и пробует снова. Пул перезапускает упавшие воркеры,
+а по SIGTERM даёт им доделать текущие задачи.
+"""
+import logging
+import signal
+import threading
+import traceback
+from datetime import timedelta
+from multiprocessing import Process
+from time import sleep
+
+from django.db import DatabaseError, close_old_connections, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+JOB_LOCK_TIMEOUT: int = 10 * 60
+JOB_RETRY_BASE: int = 10
+JOB_RETRY_MAX: int = 60 * 60
+JOB_DB_RETRIES: int = 5
+JOB_DB_BACKOFF: float = 0.5
+JOB_DB_BACKOFF_MAX: float = 30.0
+POOL_CHECK_INTERVAL: float = 1.0
+
+_stopping = threading.Event()
+
+
+def request_stop(signum=None, frame=None):
+    """Просит воркер выйти после текущей задачи; обработчик SIGTERM."""
+    _stopping.set()
+
+
+def db_backoff(failures):
+    return min(JOB_DB_BACKOFF * 2 ** (failures - 1), JOB_DB_BACKOFF_MAX)
+
+
+def claimable(now):
+    stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    return (
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    )
+
+
+def claim(batch=10):
+    """Забирает до batch готовых задач, которые не взял никто другой."""
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(claimable(now)).order_by(
+            '-priority', 'run_at'
+        ).values_list('pk', flat=True)[:batch]
+    )
+    claimed = []
+    for pk in candidates:
+        updated = Job.objects.filter(claimable(now), pk=pk).update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(
+        Job.objects.filter(pk__in=claimed).order_by('-priority', 'run_at')
+    )
+
+
+def retry_delay(attempts):
+    return min(JOB_RETRY_BASE * 2 ** (attempts - 1), JOB_RETRY_MAX)
+
+
+def set_status(job, **fields):
+    """Записывает итог задачи, переживая кратковременные ошибки базы.
+
+    Если запись так и не удалась, ошибка пробрасывается, а задача
+    остаётся RUNNING и будет выполнена повторно через JOB_LOCK_TIMEOUT.
+    """
+    for failure in range(1, JOB_DB_RETRIES + 1):
+        try:
+            Job.objects.filter(pk=job.pk).update(**fields)
+            return
+        except DatabaseError:
+            if failure == JOB_DB_RETRIES:
+                raise
+            logger.warning(
+                'Не удалось записать статус задачи #%s, попытка %s',
+                job.pk, failure, exc_info=True
+            )
+            close_old_connections()
+            sleep(db_backoff(failure))
+
+
+def run_job(job):
+    try:
+        get_task(job.name)(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s #%s упала:\n%s', job.name, job.pk, error)
+        if job.attempts >= job.max_attempts:
+            status, run_at = Job.FAILED, job.run_at
+        else:
+            status = Job.QUEUED
+            run_at = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts)
+            )
+        set_status(
+            job,
+            status=status, run_at=run_at, last_error=error, locked_at=None
+        )
+        return False
+    set_status(job, status=Job.DONE, finished=timezone.now(), locked_at=None)
+    return True
+
+
+def work(once=False, poll=1.0, batch=10):
+    """Выполняет задачи; с once=True — пока очередь не опустеет.
+
+    Между задачами проверяет, не попросили ли воркер остановиться.
+    """
+    done = 0
+    failures = 0
+    while not _stopping.is_set():
+        try:
+            jobs = claim(batch)
+            for job in jobs:
+                run_job(job)
+                done += 1
+                if _stopping.is_set():
+                    break
+        except DatabaseError:
+            failures += 1
+            logger.warning('Ошибка базы в воркере', exc_info=True)
+            close_old_connections()
+            _stopping.wait(db_backoff(failures))
+            continue
+        failures = 0
+        if not jobs:
+            if once:
+                break
+            _stopping.wait(poll)
+    return done
+
+
+def serve(options):
+    """Точка входа дочернего процесса пула."""
+    signal.signal(signal.SIGTERM, request_stop)
+    work(**options)
+
+
+def start_worker(options):
+    process = Process(target=serve, args=(options,))
+    process.start()
+    return process
+
+
+def reap(pool, options):
+    """Убирает из пула завершившиеся воркеры; возвращает число упавших.
+
+    Без once вместо каждого завершившегося запускается новый воркер.
+    """
+    failed = 0
+    for process in [process for process in pool if not process.is_alive()]:
+        pool.remove(process)
+        if process.exitcode:
+            logger.error(
+                'Воркер %s завершился с кодом %s',
+                process.pid, process.exitcode
+            )
+        if not options.get('once'):
+            pool.append(start_worker(options))
+        elif process.exitcode:
+            failed += 1
+    return failed
+
+
+def run_pool(processes, **options):
+    """Запускает processes воркеров и следит за ними.
+
+    Воркер, завершившийся без запроса на остановку, перезапускается;
+    с once=True вместо этого учитывается, если он вышел с ошибкой.
+    По SIGTERM воркеры получают тот же сигнал и доделывают текущие
+    задачи. Возвращает число воркеров, завершившихся с ошибкой.
+    """
+    _stopping.clear()
+    signal.signal(signal.SIGTERM, request_stop)
+    if processes == 1:
+        work(**options)
+        return 0
+    connections.close_all()
+    pool = [start_worker(options) for _ in range(processes)]
+    failed = 0
+    while pool and not _stopping.wait(POOL_CHECK_INTERVAL):
+        failed += reap(pool, options)
+    for process in pool:
+        process.terminate()
+    for process in pool:
+        process.join()
+    return failed
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import Comment, Follow, Group, Notification, Post
 
 
 class CommentInline(admin.TabularInline):
@@ -18,7 +18,7 @@ class PostAdmin(admin.ModelAdmin):
 
 class PostGroup(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
-    list_display = ('pk', 'title', 'slug')
+    list_display = ('pk', 'title', 'slug', 'posts_count', 'last_post_date')
     search_fields = ('title',)
     list_filter = ('title',)
     empty_value_display = '-пусто-'
@@ -32,3 +32,4 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group, PostGroup)
 admin.site.register(Follow, FollowAdmin)
 admin.site.register(Comment)
+admin.site.register(Notification)
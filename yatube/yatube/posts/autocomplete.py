@@ -0,0 +1,295 @@
+"""Подсказки при вводе: имена пользователей и названия групп.
+
+Индекс — отсортированный список строк «ключ\\tвид\\tзначение\\tподпись»,
+поиск по префиксу — bisect, то есть O(log n) даже на миллионах имён.
+Между процессами индекс передаётся сжатым снимком через общий кэш,
+нарезанным на части меньше предела memcached. Снимок строят только
+команда build_autocomplete и фоновая задача; пока процесс не видел ни
+одного снимка, подсказки ищутся ограниченным запросом к базе.
+Сигналы сохранения User и Group не трогают снимок: они дописывают
+изменение в журнал под номером из атомарного incr, и каждый процесс
+применяет к своей копии индекса изменения, которых ещё не видел.
+"""
+import zlib
+from bisect import bisect_left, insort
+from time import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Group, User
+from .search import normalize
+
+SNAPSHOT_KEY = 'autocomplete:snapshot'
+SNAPSHOT_CHUNK: int = 512 * 1024
+SEQ_KEY = 'autocomplete:seq'
+DELTA_TIMEOUT: int = 24 * 60 * 60
+COMPACT_AFTER: int = 1000
+REBUILD_PERIOD: int = 10 * 60
+SUGGESTIONS_LIMIT: int = 10
+USER = 'user'
+GROUP = 'group'
+
+
+def clean(value):
+    return ' '.join(str(value).split())
+
+
+def name_keys(*names):
+    """Ключи имени: вся строка и каждый её хвост с начала слова,
+    чтобы «тол» находил «Лев Толстой»."""
+    keys = set()
+    for name in names:
+        words = normalize(clean(name)).split()
+        for start in range(len(words)):
+            keys.add(' '.join(words[start:]))
+    return keys
+
+
+class PrefixIndex:
+    def __init__(self, entries=()):
+        self.entries = sorted(entries)
+        self.owners = {}
+        for entry in self.entries:
+            _, kind, value, _ = entry.split('\t')
+            self.owners.setdefault((kind, value), []).append(entry)
+
+    def add(self, kind, value, label, names):
+        self.discard(kind, value)
+        value, label = clean(value), clean(label)
+        entries = [
+            f'{key}\t{kind}\t{value}\t{label}' for key in name_keys(*names)
+        ]
+        for entry in entries:
+            insort(self.entries, entry)
+        self.owners[(kind, value)] = entries
+
+    def discard(self, kind, value):
+        for entry in self.owners.pop((kind, clean(value)), []):
+            position = bisect_left(self.entries, entry)
+            if (position < len(self.entries)
+                    and self.entries[position] == entry):
+                del self.entries[position]
+
+    def search(self, prefix, limit=SUGGESTIONS_LIMIT):
+        prefix = normalize(clean(prefix))
+        results = []
+        if not prefix:
+            return results
+        seen = set()
+        position = bisect_left(self.entries, prefix)
+        while position < len(self.entries) and len(results) < limit:
+            entry = self.entries[position]
+            if not entry.startswith(prefix):
+                break
+            _, kind, value, label = entry.split('\t')
+            if (kind, value) not in seen:
+                seen.add((kind, value))
+                results.append((kind, value, label))
+            position += 1
+        return results
+
+    def dumps(self):
+        return zlib.compress('\n'.join(self.entries).encode())
+
+    @classmethod
+    def loads(cls, data):
+        text = zlib.decompress(data).decode()
+        return cls(text.split('\n') if text else ())
+
+
+def user_names(user):
+    return user.username, user.get_full_name()
+
+
+def build_index():
+    index = PrefixIndex()
+    users = User.objects.filter(is_active=True).values_list(
+        'username', 'first_name', 'last_name'
+    )
+    for username, first_name, last_name in users.iterator():
+        full_name = f'{first_name} {last_name}'.strip()
+        index.add(USER, username, full_name or username,
+                  (username, full_name))
+    for slug, title in Group.objects.values_list('slug', 'title').iterator():
+        index.add(GROUP, slug, title, (title,))
+    return index
+
+
+_local = {'snapshot': None, 'seq': 0, 'index': None, 'scheduled': None}
+
+
+def delta_key(number):
+    return f'autocomplete:delta:{number}'
+
+
+def chunk_keys(snapshot, count):
+    return [f'{SNAPSHOT_KEY}:{snapshot}:{number}' for number in range(count)]
+
+
+def rebuild():
+    """Строит индекс из базы и публикует снимок. Вызывается только
+    командой build_autocomplete и задачей rebuild_autocomplete,
+    никогда — из запроса.
+
+    Снимок режется на части по SNAPSHOT_CHUNK байт: memcached молча
+    отбрасывает значения больше мегабайта. Описание снимка
+    публикуется, только когда все части записаны и прочитаны обратно.
+    """
+    base_seq = cache.get(SEQ_KEY, 0)
+    index = build_index()
+    blob = index.dumps()
+    snapshot = uuid4().hex
+    keys = chunk_keys(snapshot, -(-len(blob) // SNAPSHOT_CHUNK) or 1)
+    chunks = {
+        key: blob[number * SNAPSHOT_CHUNK:(number + 1) * SNAPSHOT_CHUNK]
+        for number, key in enumerate(keys)
+    }
+    failed = cache.set_many(chunks, None)
+    if failed or len(cache.get_many(keys)) != len(keys):
+        cache.delete_many(keys)
+        raise RuntimeError('Снимок подсказок не записан в кэш')
+    previous = cache.get(SNAPSHOT_KEY)
+    cache.set(SNAPSHOT_KEY, (snapshot, base_seq, len(keys)), None)
+    if previous is not None:
+        cache.delete_many(chunk_keys(previous[0], previous[2]))
+    _local.update(snapshot=snapshot, seq=base_seq, index=index)
+    return index
+
+
+def schedule_rebuild():
+    """Ставит пересборку снимка в очередь, не чаще раза
+    в REBUILD_PERIOD секунд."""
+    from .tasks import rebuild_autocomplete
+    period = int(time() // REBUILD_PERIOD)
+    if _local['scheduled'] == period:
+        return
+    _local['scheduled'] = period
+    rebuild_autocomplete.enqueue(key=f'autocomplete:rebuild:{period}')
+
+
+def load_snapshot(meta):
+    snapshot, base_seq, count = meta
+    keys = chunk_keys(snapshot, count)
+    chunks = cache.get_many(keys)
+    if len(chunks) != count:
+        return False
+    blob = b''.join(chunks[key] for key in keys)
+    _local.update(
+        snapshot=snapshot, seq=base_seq, index=PrefixIndex.loads(blob)
+    )
+    return True
+
+
+def apply(index, delta):
+    operation, kind, value, label, names = delta
+    if operation == 'add':
+        index.add(kind, value, label, names)
+    else:
+        index.discard(kind, value)
+
+
+def get_index():
+    """Индекс процесса: снимок плюс изменения после него, или None,
+    пока ни одного снимка процесс не видел.
+
+    Снимок, который не удалось прочитать, не сбрасывает уже
+    загруженный индекс. За один вызов применяется не больше
+    COMPACT_AFTER изменений по порядку номеров; при большем отставании
+    или истёкшем изменении процесс отвечает по последнему целому
+    индексу и ставит сборку снимка в очередь.
+    """
+    meta = cache.get(SNAPSHOT_KEY)
+    if meta is None or (meta[0] != _local['snapshot']
+                        and not load_snapshot(meta)):
+        schedule_rebuild()
+    index = _local['index']
+    if index is None:
+        return None
+    seq = cache.get(SEQ_KEY, 0)
+    if seq - _local['seq'] > COMPACT_AFTER:
+        schedule_rebuild()
+        return index
+    if seq > _local['seq']:
+        numbers = range(_local['seq'] + 1, seq + 1)
+        deltas = cache.get_many([delta_key(number) for number in numbers])
+        for number in numbers:
+            delta = deltas.get(delta_key(number))
+            if delta is None:
+                if len(deltas) > number - _local['seq'] - 1:
+                    # Изменение истекло раньше, чем его применили:
+                    # догнать журнал может только новый снимок.
+                    schedule_rebuild()
+                break
+            apply(index, delta)
+            _local['seq'] = number
+    return index
+
+
+def record(*delta):
+    """Записывает изменение под следующим номером: номер выдаёт
+    атомарный incr, поэтому процессы не затирают изменения друг
+    друга, а запись стоит O(1) независимо от размера индекса."""
+    if cache.add(SEQ_KEY, 1, None):
+        number = 1
+    else:
+        number = cache.incr(SEQ_KEY)
+    cache.set(delta_key(number), delta, DELTA_TIMEOUT)
+
+
+def update_user(user, previous_username=None):
+    if previous_username and previous_username != user.username:
+        record('discard', USER, previous_username, None, None)
+    if user.is_active:
+        full_name = user.get_full_name()
+        record('add', USER, user.username, full_name or user.username,
+               user_names(user))
+    else:
+        record('discard', USER, user.username, None, None)
+
+
+def remove_user(username):
+    record('discard', USER, username, None, None)
+
+
+def update_group(group, previous_slug=None):
+    if previous_slug and previous_slug != group.slug:
+        record('discard', GROUP, previous_slug, None, None)
+    record('add', GROUP, group.slug, group.title, (group.title,))
+
+
+def remove_group(slug):
+    record('discard', GROUP, slug, None, None)
+
+
+def search_database(prefix, limit=SUGGESTIONS_LIMIT):
+    """Подсказки прямо из базы, пока процесс не получил снимок: по
+    началу логина, имени, фамилии и названия группы, не больше limit
+    строк каждого вида."""
+    prefix = clean(prefix)
+    if not prefix:
+        return []
+    users = User.objects.filter(is_active=True).filter(
+        Q(username__istartswith=prefix)
+        | Q(first_name__istartswith=prefix)
+        | Q(last_name__istartswith=prefix)
+    ).order_by('username').values_list(
+        'username', 'first_name', 'last_name'
+    )[:limit]
+    results = []
+    for username, first_name, last_name in users:
+        full_name = f'{first_name} {last_name}'.strip()
+        results.append((USER, username, clean(full_name or username)))
+    groups = Group.objects.filter(title__istartswith=prefix).order_by(
+        'title'
+    ).values_list('slug', 'title')[:limit]
+    results.extend((GROUP, slug, clean(title)) for slug, title in groups)
+    return results[:limit]
+
+
+def suggest(prefix, limit=SUGGESTIONS_LIMIT):
+    index = get_index()
+    if index is None:
+        return search_database(prefix, limit)
+    return index.search(prefix, limit)
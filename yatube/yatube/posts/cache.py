@@ -0,0 +1,34 @@
+from django.core.cache import cache
+
+from core.objectcache import ModelCache
+from users.cache import user_cache  # noqa: F401
+
+from .models import Group, Post
+
+CONTENT_VERSION_KEY = 'content:version'
+
+post_cache = ModelCache(Post)
+group_cache = ModelCache(Group, lookups=['slug'])
+
+
+def get_group_or_404(slug):
+    """Группа по slug из кэша; при промахе читается из базы."""
+    return group_cache.get_or_404(slug=slug)
+
+
+def content_version():
+    """Номер версии контента: растёт при любом изменении постов,
+    комментариев и того, что в них ищется."""
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, 1, None)
+        version = cache.get(CONTENT_VERSION_KEY, 1)
+    return version
+
+
+def bump_content_version():
+    try:
+        return cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        cache.add(CONTENT_VERSION_KEY, 2, None)
+        return cache.get(CONTENT_VERSION_KEY, 2)
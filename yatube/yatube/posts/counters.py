@@ -0,0 +1,151 @@
+"""Буферизованные счётчики просмотров постов.
+
+UPDATE на каждый просмотр выстроил бы все чтения в очередь за
+единственным писателем SQLite. Вместо этого просмотры копятся в
+памяти процесса: счётчик и HyperLogLog-скетч зрителей на пост.
+Фоновый поток раз в VIEWS_FLUSH_INTERVAL секунд, а также выход
+процесса сбрасывают накопленное в базу одной транзакцией: один
+UPDATE счётчиков на всю пачку, слияние скетчей и вклад просмотров
+в рейтинг популярного. Запрос страницы сам в базу не пишет; если
+запись не удалась, просмотры возвращаются в буфер до следующего
+сброса.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from functools import wraps
+from time import sleep
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, When
+
+from core.hll import HyperLogLog
+from core.ratelimit import client_key
+
+from .models import Post, PostViews
+from .trending import VIEW_WEIGHT, add_scores
+
+logger = logging.getLogger(__name__)
+
+
+def write_views(views, sketches):
+    """Прибавляет накопленные просмотры к строкам PostViews."""
+    with transaction.atomic():
+        post_ids = set(Post.objects.filter(
+            pk__in=list(views)
+        ).values_list('pk', flat=True))
+        views = {pk: count for pk, count in views.items() if pk in post_ids}
+        if not views:
+            return
+        PostViews.objects.bulk_create(
+            [PostViews(post_id=post_id) for post_id in views],
+            ignore_conflicts=True,
+        )
+        rows = PostViews.objects.select_for_update().filter(
+            post_id__in=list(views)
+        ).only('sketch')
+        for row in rows:
+            sketch = sketches[row.post_id]
+            if row.sketch:
+                sketch.merge(HyperLogLog(row.sketch))
+            row.sketch = bytes(sketch)
+            row.uniques = sketch.count()
+        PostViews.objects.bulk_update(rows, ['sketch', 'uniques'])
+        PostViews.objects.filter(post_id__in=list(views)).update(views=Case(
+            *(When(post_id=post_id, then=F('views') + count)
+              for post_id, count in views.items()),
+            default=F('views'),
+        ))
+        add_scores({
+            post_id: count * VIEW_WEIGHT for post_id, count in views.items()
+        })
+
+
+class ViewBuffer:
+    """Просмотры, ещё не записанные в базу."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = Counter()
+        self.sketches = {}
+        self.pid = None
+
+    def record(self, post_id, viewer):
+        with self.lock:
+            self.views[post_id] += 1
+            if post_id not in self.sketches:
+                self.sketches[post_id] = HyperLogLog()
+            self.sketches[post_id].add(viewer)
+        self.start()
+
+    def start(self):
+        """Запускает фоновый сброс в текущем процессе; после fork
+        поток запускается заново. Без VIEWS_FLUSH_INTERVAL буфер
+        сбрасывают только явным flush()."""
+        interval = settings.VIEWS_FLUSH_INTERVAL
+        if not interval or self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(
+            target=self.run, args=(interval,), name='view-buffer',
+            daemon=True,
+        ).start()
+        atexit.register(self.flush)
+
+    def run(self, interval):
+        while True:
+            sleep(interval)
+            self.flush()
+            close_old_connections()
+
+    def drain(self):
+        with self.lock:
+            views, sketches = self.views, self.sketches
+            self.views, self.sketches = Counter(), {}
+        return views, sketches
+
+    def restore(self, views, sketches):
+        """Возвращает в буфер просмотры, которые не удалось записать."""
+        with self.lock:
+            self.views.update(views)
+            for post_id, sketch in sketches.items():
+                if post_id in self.sketches:
+                    self.sketches[post_id].merge(sketch)
+                else:
+                    self.sketches[post_id] = sketch
+
+    def flush(self):
+        """Пишет накопленное в базу; возвращает число постов."""
+        views, sketches = self.drain()
+        if not views:
+            return 0
+        try:
+            write_views(views, sketches)
+        except Exception:
+            logger.exception(
+                'Не удалось записать просмотры %d постов', len(views)
+            )
+            self.restore(views, sketches)
+            return 0
+        return len(views)
+
+
+buffer = ViewBuffer()
+
+
+def counts_views(view):
+    """Учитывает успешный GET страницы поста, в том числе отданной
+    из кэша страниц."""
+    @wraps(view)
+    def wrapper(request, post_id, *args, **kwargs):
+        response = view(request, post_id, *args, **kwargs)
+        if request.method == 'GET' and response.status_code == 200:
+            buffer.record(int(post_id), client_key(request, 'user_or_ip'))
+        return response
+    return wrapper
@@ -0,0 +1,183 @@
+"""RSS и Atom ленты сайта, групп и авторов.
+
+Лента строится из облегчённой выборки нужных полей, а не из моделей
+целиком. У каждой области (сайт, группа, автор) в базе есть строка
+FeedVersion: номер версии и время последнего изменения её постов.
+Сигналы постов увеличивают версию, поэтому готовая лента живёт в кэше
+до следующего поста, а повторный опрос с If-None-Match или
+If-Modified-Since получает 304 за один запрос по первичному ключу,
+не касаясь шаблонов. Версия в базе одна для всех процессов, так что
+ни один из них не отдаст устаревшую ленту.
+"""
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import F
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.views.decorators.http import condition
+
+from .cache import get_group_or_404, user_cache
+from .models import FeedVersion, Post
+
+FEED_SIZE: int = 20
+FEED_CACHE_TIMEOUT: int = 24 * 60 * 60
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+ITEM_FIELDS = (
+    'pk',
+    'excerpt',
+    'pub_date',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+)
+
+
+def touch_feeds(*scopes):
+    """Отмечает изменение постов в областях: старые ленты и их ETag
+    перестают совпадать."""
+    now = timezone.now()
+    FeedVersion.objects.bulk_create(
+        [FeedVersion(scope=scope, updated=now) for scope in scopes],
+        ignore_conflicts=True,
+    )
+    FeedVersion.objects.filter(scope__in=scopes).update(
+        version=F('version') + 1, updated=now
+    )
+
+
+def post_scopes(post, group_id=None):
+    scopes = ['site', f'author:{post.author_id}']
+    for scope_group_id in {post.group_id, group_id} - {None}:
+        scopes.append(f'group:{scope_group_id}')
+    return scopes
+
+
+def feed_stamp(scope):
+    """Время и ETag последнего изменения области; строка области
+    без изменений заводится при первом чтении."""
+    stamp = FeedVersion.objects.filter(scope=scope).values_list(
+        'updated', 'version'
+    ).first()
+    if stamp is None:
+        version, _ = FeedVersion.objects.get_or_create(
+            scope=scope, defaults={'updated': timezone.now()}
+        )
+        stamp = (version.updated, version.version)
+    updated, version = stamp
+    return updated, f'{scope}-{version}'
+
+
+class PostFeed(Feed):
+    """Последние посты сайта."""
+    title = 'Yatube: последние обновления'
+    description = 'Новые посты всех авторов Yatube.'
+
+    def __init__(self, kind):
+        super().__init__()
+        self.feed_type = FEED_TYPES[kind]
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).values(*ITEM_FIELDS)[:FEED_SIZE]
+
+    def item_title(self, item):
+        name = ' '.join(filter(None, (
+            item['author__first_name'], item['author__last_name']
+        )))
+        return f'{name or item["author__username"]}: {item["excerpt"]}'
+
+    def item_description(self, item):
+        return item['excerpt']
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item['pk']])
+
+    def item_pubdate(self, item):
+        return item['pub_date']
+
+    def item_author_name(self, item):
+        return item['author__username']
+
+
+class GroupFeed(PostFeed):
+    """Последние посты группы."""
+
+    def get_object(self, request, slug):
+        return get_group_or_404(slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+    def posts(self, obj):
+        return Post.objects.filter(group_id=obj.pk)
+
+
+class AuthorFeed(PostFeed):
+    """Последние посты автора."""
+
+    def get_object(self, request, username):
+        return user_cache.get_or_404(username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Новые посты автора {obj.username}.'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def posts(self, obj):
+        return Post.objects.filter(author_id=obj.pk)
+
+
+def feed_view(feed_class, scope):
+    """Представление ленты: scope по параметрам адреса возвращает
+    область, отметка которой служит ETag и Last-Modified."""
+    def view(request, kind, **kwargs):
+        if kind not in FEED_TYPES:
+            raise Http404('Неизвестный формат ленты')
+        area = scope(**kwargs)
+        modified, etag = feed_stamp(area)
+
+        @condition(
+            etag_func=lambda request, **kwargs: etag,
+            last_modified_func=lambda request, **kwargs: modified,
+        )
+        def render(request, **kwargs):
+            # Ссылки в ленте абсолютные и строятся по запросу, поэтому
+            # тело зависит ещё от схемы и хоста.
+            origin = f'{request.scheme}://{request.get_host()}'
+            key = f'feed:body:{kind}:{etag}:{origin}'
+            body = cache.get(key)
+            if body is None:
+                response = feed_class(kind)(request, **kwargs)
+                body = (response.content, response['Content-Type'])
+                cache.set(key, body, FEED_CACHE_TIMEOUT)
+            return HttpResponse(body[0], content_type=body[1])
+
+        return render(request, **kwargs)
+    return view
+
+
+site_feed = feed_view(PostFeed, lambda: 'site')
+group_feed = feed_view(
+    GroupFeed, lambda slug: f'group:{get_group_or_404(slug).pk}'
+)
+author_feed = feed_view(
+    AuthorFeed,
+    lambda username: f'author:{user_cache.get_or_404(username=username).pk}',
+)
@@ -0,0 +1,54 @@
+from core.fragments import register
+
+from .forms import CommentForm
+from .likes import like_counts, liked_post_ids
+from .models import Follow
+from .notifications import unread_count
+
+
+@register('switcher', 'posts/includes/switcher.html')
+def switcher(request):
+    return {}
+
+
+@register('follow_button', 'posts/includes/follow_button.html')
+def follow_button(request, username):
+    user = request.user
+    following = user.is_authenticated and Follow.objects.filter(
+        user=user, author__username=username
+    ).exists()
+    return {'author_username': username, 'following': following}
+
+
+@register('post_actions', 'posts/includes/post_actions.html')
+def post_actions(request, post_id, author_id):
+    return {'post_id': post_id, 'is_author': request.user.id == author_id}
+
+
+@register('comment_form', 'posts/includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm(request.POST or None)}
+
+
+@register('notifications', 'posts/includes/notifications_link.html')
+def notifications(request):
+    user = request.user
+    return {'unread': unread_count(user) if user.is_authenticated else 0}
+
+
+@register('like_button', 'posts/includes/like_button.html', batch=True)
+def like_buttons(request, params_list):
+    """Кнопки всех постов страницы: счётчики и отметки пользователя
+    читаются двумя запросами на страницу."""
+    post_ids = [params['post_id'] for params in params_list]
+    counts = like_counts(post_ids)
+    liked = liked_post_ids(request.user, post_ids)
+    return [
+        {
+            'post_id': post_id,
+            'likes': counts.get(post_id, 0),
+            'liked': post_id in liked,
+            'next': request.get_full_path(),
+        }
+        for post_id in post_ids
+    ]
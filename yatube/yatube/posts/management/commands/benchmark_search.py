@@ -0,0 +1,106 @@
+import random
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from posts.models import Group, Post
+from posts.search import (fuzzy_search_ids, index_post, search_tokens,
+                          tokenize)
+
+User = get_user_model()
+
+WORDS = (
+    'путешествие горы море закат город река лес осень зима весна лето '
+    'фотография книга музыка кофе дорога поезд самолёт остров берег '
+    'котики собаки прогулка вечер утро праздник история память друзья '
+    'travel mountain river coffee music winter summer forest'
+).split()
+
+
+def icontains_search(query):
+    """Прежний поиск: LIKE по тексту, группе и автору для каждого слова."""
+    posts = Post.objects.all()
+    for word in query.split():
+        posts = posts.filter(
+            Q(text__icontains=word)
+            | Q(group__title__icontains=word)
+            | Q(author__username__icontains=word)
+            | Q(author__first_name__icontains=word)
+            | Q(author__last_name__icontains=word)
+        )
+    return list(posts.values_list('pk', flat=True))
+
+
+def typo(word, rnd):
+    """Слово с одной случайной опечаткой: пропуск или замена буквы."""
+    position = rnd.randrange(1, len(word))
+    if rnd.random() < 0.5:
+        return word[:position] + word[position + 1:]
+    return word[:position] + rnd.choice('аеиоу') + word[position + 1:]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LIKE-поиск, индекс основ и триграммный поиск '
+        'на сгенерированном корпусе. Корпус удаляется после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, label, search, queries):
+        found = 0
+        start = perf_counter()
+        for query in queries:
+            found += bool(search(query))
+        elapsed = (perf_counter() - start) * 1000 / len(queries)
+        self.stdout.write(
+            f'{label}: {elapsed:.2f} мс на запрос, '
+            f'найдено по {found} из {len(queries)}'
+        )
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        with transaction.atomic():
+            author = User.objects.create_user(username='benchmark_search')
+            group = Group.objects.create(
+                title='Бенчмарк', slug='benchmark-search'
+            )
+            Post.objects.bulk_create(
+                Post(
+                    author=author,
+                    group=group if rnd.random() < 0.5 else None,
+                    text=' '.join(rnd.choices(WORDS, k=30)),
+                )
+                for _ in range(options['posts'])
+            )
+            for post in Post.objects.filter(author=author):
+                index_post(post)
+            queries = [
+                ' '.join(rnd.sample(WORDS, 2))
+                for _ in range(options['queries'])
+            ]
+            typos = [
+                ' '.join(typo(word, rnd) for word in query.split())
+                for query in queries
+            ]
+            self.measure('icontains', icontains_search, queries)
+            self.measure(
+                'основы',
+                lambda query: list(search_tokens(tokenize(query)).values_list(
+                    'pk', flat=True
+                )),
+                queries,
+            )
+            self.measure('icontains с опечатками', icontains_search, typos)
+            self.measure(
+                'триграммы с опечатками',
+                lambda query: fuzzy_search_ids(tokenize(query)),
+                typos,
+            )
+            transaction.set_rollback(True)
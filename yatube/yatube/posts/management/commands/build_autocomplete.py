@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.autocomplete import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит снимок индекса подсказок поиска из базы. Запускается '
+        'при выкладке и по расписанию чаще, чем истекают изменения '
+        '(DELTA_TIMEOUT).'
+    )
+
+    def handle(self, *args, **options):
+        index = rebuild()
+        self.stdout.write(f'Записей в индексе: {len(index.entries)}')
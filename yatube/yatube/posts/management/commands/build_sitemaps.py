@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит карты сайта в SITEMAP_ROOT. По умолчанию дописывает '
+        'новые посты; --full пересобирает всё, убирая удалённые.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument('--base-url', default=settings.SITE_URL)
+
+    def handle(self, *args, **options):
+        manifest = build_sitemaps(
+            settings.SITEMAP_ROOT, options['base_url'], full=options['full']
+        )
+        for name, files in manifest.items():
+            urls = sum(record['count'] for record in files)
+            self.stdout.write(f'{name}: файлов {len(files)}, адресов {urls}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import decay
+
+
+class Command(BaseCommand):
+    help = (
+        'Затухание рейтинга популярных постов с прошлого запуска. '
+        'Запускается по расписанию, например раз в час.'
+    )
+
+    def handle(self, *args, **options):
+        factor, removed = decay()
+        self.stdout.write(
+            f'Множитель затухания: {factor:.4f}, удалено угасших: {removed}'
+        )
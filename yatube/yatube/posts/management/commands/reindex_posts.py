@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import index_post, prune_trigrams
+from posts.tags import update_post_tags
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс и теги постов.'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.select_related('author', 'group').order_by('pk')
+        count = 0
+        for post in posts.iterator():
+            index_post(post)
+            update_post_tags(post)
+            count += 1
+        self.stdout.write(f'Проиндексировано постов: {count}')
+        self.stdout.write(f'Удалено триграмм: {prune_trigrams()}')
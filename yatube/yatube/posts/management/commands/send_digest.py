@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает сводку непрочитанных уведомлений тем, кто её включил. '
+        'Запускается раз в день по расписанию.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Отправлено сводок: {send_digests()}')
@@ -0,0 +1,29 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import cached_search_ids, normalize
+
+
+class Command(BaseCommand):
+    help = 'Прогревает кэш поиска самыми частыми запросами из журнала.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SEARCH_QUERY_LOG)
+        parser.add_argument('--top', type=int, default=100)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['log'], encoding='utf-8') as log:
+                queries = Counter(
+                    ' '.join(normalize(line).split()) for line in log
+                )
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {options["log"]} не найден')
+        queries.pop('', None)
+        for query, _ in queries.most_common(options['top']):
+            cached_search_ids(query)
+        self.stdout.write(
+            f'Прогрето запросов: {min(len(queries), options["top"])}'
+        )
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:35
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    stats = Group.objects.annotate(
+        count=Count('posts'),
+        latest=Max('posts__pub_date'),
+    )
+    for group in stats:
+        Group.objects.filter(pk=group.pk).update(
+            posts_count=group.count,
+            last_post_date=group.latest,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20220716_2013'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_date',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Последняя публикация'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='posts_post_group_i_1fdac4_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenTrigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3, verbose_name='Триграмма')),
+                ('token', models.CharField(max_length=64, verbose_name='Основа слова')),
+            ],
+            options={
+                'verbose_name': 'Триграмма основы',
+                'verbose_name_plural': 'Триграммы основ',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tokentrigram',
+            constraint=models.UniqueConstraint(fields=('trigram', 'token'), name='unique token trigram'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0013_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedMarker',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_marker', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_seen', models.DateTimeField(null=True, verbose_name='Лента просмотрена')),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name='Новых постов')),
+            ],
+            options={
+                'verbose_name': 'Отметка ленты подписок',
+                'verbose_name_plural': 'Отметки ленты подписок',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViews',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_stats', serialize=False, to='posts.Post')),
+                ('views', models.BigIntegerField(default=0, verbose_name='Просмотров')),
+                ('uniques', models.PositiveIntegerField(default=0, verbose_name='Уникальных зрителей')),
+                ('sketch', models.BinaryField(default=bytes, verbose_name='Скетч зрителей')),
+            ],
+            options={
+                'verbose_name': 'Просмотры поста',
+                'verbose_name_plural': 'Просмотры постов',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_notification_kind_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVersion',
+            fields=[
+                ('scope', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Область')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+                ('updated', models.DateTimeField(verbose_name='Изменена')),
+            ],
+            options={
+                'verbose_name': 'Версия ленты',
+                'verbose_name_plural': 'Версии лент',
+            },
+        ),
+    ]
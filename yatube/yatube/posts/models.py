@@ -1,13 +1,49 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.text import Truncator
+
+from core.querycache import CachingQuerySet
 
 User = get_user_model()
 
+EXCERPT_WORDS: int = 15
+EXCERPT_LENGTH: int = 1000
+FEED_FIELDS = (
+    'excerpt',
+    'pub_date',
+    'image',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__slug',
+    'group__title',
+)
+
+
+def make_excerpt(text):
+    """Анонс поста: первые слова текста, как в лентах."""
+    excerpt = Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    return Truncator(excerpt).chars(EXCERPT_LENGTH)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
+    last_post_date = models.DateTimeField(
+        'Последняя публикация',
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True
+    )
 
     def __str__(self):
         return self.title
@@ -17,11 +53,23 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class PostQuerySet(CachingQuerySet):
+    def for_feed(self):
+        """Только поля, которые выводят ленты: вместо текста — анонс."""
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста'
     )
+    excerpt = models.CharField(
+        'Анонс',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True
@@ -47,11 +95,24 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['group', '-pub_date']),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -80,6 +141,9 @@ class Comment(models.Model):
         return self.text
 
     class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created']),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -106,3 +170,283 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Подписка {self.user} на {self.author}'
+
+
+class SearchToken(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_tokens'
+    )
+    token = models.CharField('Основа слова', max_length=64)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['token', 'post'],
+            name='unique search token'
+        )]
+        verbose_name = 'Поисковая основа'
+        verbose_name_plural = 'Поисковые основы'
+
+    def __str__(self):
+        return self.token
+
+
+class TokenTrigram(models.Model):
+    trigram = models.CharField('Триграмма', max_length=3)
+    token = models.CharField('Основа слова', max_length=64)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['trigram', 'token'],
+            name='unique token trigram'
+        )]
+        verbose_name = 'Триграмма основы'
+        verbose_name_plural = 'Триграммы основ'
+
+    def __str__(self):
+        return f'{self.trigram} → {self.token}'
+
+
+class Notification(models.Model):
+    POST = 'post'
+    MENTION = 'mention'
+    KINDS = [
+        (POST, 'Новый пост автора'),
+        (MENTION, 'Упоминание'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    is_read = models.BooleanField('Прочитано', default=False)
+    kind = models.CharField(
+        'Повод', max_length=10, choices=KINDS, default=POST
+    )
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post', 'kind'],
+            name='unique notification kind'
+        )]
+        indexes = [
+            models.Index(fields=['user', '-created']),
+            models.Index(fields=['user', 'is_read']),
+        ]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
+
+
+class NotificationState(models.Model):
+    """Счётчик непрочитанного и настройки рассылки пользователя:
+    шапка сайта читает одну строку вместо подсчёта уведомлений."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_state'
+    )
+    unread = models.PositiveIntegerField('Непрочитанных', default=0)
+    digest = models.BooleanField('Ежедневная сводка на почту', default=False)
+    mentions = models.BooleanField('Уведомлять об упоминаниях', default=True)
+    last_digest = models.DateTimeField(
+        'Последняя сводка', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Состояние уведомлений'
+        verbose_name_plural = 'Состояния уведомлений'
+
+    def __str__(self):
+        return f'{self.user}: {self.unread}'
+
+
+class FeedMarker(models.Model):
+    """Когда пользователь последний раз открывал ленту подписок
+    и сколько постов в ней появилось с тех пор."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_marker'
+    )
+    last_seen = models.DateTimeField('Лента просмотрена', null=True)
+    unread = models.PositiveIntegerField('Новых постов', default=0)
+
+    class Meta:
+        verbose_name = 'Отметка ленты подписок'
+        verbose_name_plural = 'Отметки ленты подписок'
+
+    def __str__(self):
+        return f'{self.user}: {self.unread}'
+
+
+class PostScore(models.Model):
+    """Рейтинг поста для вкладки «Популярное»: растёт с комментариями
+    и подписками и периодически затухает."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score'
+    )
+    score = models.FloatField('Рейтинг', default=0)
+    updated = models.DateTimeField('Обновлён', auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-score'])]
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.2f}'
+
+
+class FeedVersion(models.Model):
+    """Версия RSS/Atom-ленты области (site, group:<id>, author:<id>):
+    растёт с каждым изменением её постов и служит ETag ленты."""
+    scope = models.CharField('Область', max_length=64, primary_key=True)
+    version = models.PositiveIntegerField('Версия', default=0)
+    updated = models.DateTimeField('Изменена')
+
+    class Meta:
+        verbose_name = 'Версия ленты'
+        verbose_name_plural = 'Версии лент'
+
+    def __str__(self):
+        return f'{self.scope}: {self.version}'
+
+
+class TrendingState(models.Model):
+    """Единственная строка: когда рейтинги затухали в последний раз.
+
+    Время лежит в базе, а не в кэше процесса, чтобы каждый запуск
+    decay_trending видел прошлый запуск."""
+    decayed_at = models.DateTimeField('Затухание', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Состояние рейтинга'
+        verbose_name_plural = 'Состояние рейтинга'
+
+    def __str__(self):
+        return f'Затухание: {self.decayed_at}'
+
+
+class PostViews(models.Model):
+    """Просмотры поста: счётчик и HyperLogLog-скетч зрителей для
+    оценки числа уникальных."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='view_stats'
+    )
+    views = models.BigIntegerField('Просмотров', default=0)
+    uniques = models.PositiveIntegerField('Уникальных зрителей', default=0)
+    sketch = models.BinaryField('Скетч зрителей', default=bytes)
+
+    class Meta:
+        verbose_name = 'Просмотры поста'
+        verbose_name_plural = 'Просмотры постов'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.views}'
+
+
+class Like(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'],
+            name='unique like'
+        )]
+        verbose_name = 'Отметка «нравится»'
+        verbose_name_plural = 'Отметки «нравится»'
+
+    def __str__(self):
+        return f'{self.user} → {self.post_id}'
+
+
+class LikeCounter(models.Model):
+    """Часть счётчика отметок поста: отметки популярного поста
+    разносятся по нескольким строкам. Разгружает только базы с
+    блокировками строк; SQLite блокирует на запись всю базу."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='like_counters'
+    )
+    shard = models.PositiveSmallIntegerField('Часть')
+    count = models.IntegerField('Отметок', default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['post', 'shard'],
+            name='unique like shard'
+        )]
+        verbose_name = 'Счётчик отметок'
+        verbose_name_plural = 'Счётчики отметок'
+
+    def __str__(self):
+        return f'{self.post_id}/{self.shard}: {self.count}'
+
+
+class Tag(models.Model):
+    name = models.CharField('Тег', max_length=64, unique=True)
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Тег поста. Дата публикации повторяет дату поста, чтобы лента
+    тега читалась по индексу (tag, -pub_date) без сортировки постов."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['post', 'tag'],
+            name='unique post tag'
+        )]
+        indexes = [models.Index(fields=['tag', '-pub_date'])]
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.tag_id}'
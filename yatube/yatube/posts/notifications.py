@@ -0,0 +1,202 @@
+"""Уведомления подписчиков о новых постах.
+
+Новый пост раскладывается по подписчикам фоновой задачей пачками:
+один INSERT уведомлений и один UPDATE счётчиков на пачку, без
+сохранения строк по одной. Счётчик непрочитанного пересчитывается
+подзапросом, поэтому повтор упавшей задачи не удваивает его, а шапка
+сайта читает его из кэша. Так же считается и число новых постов
+в ленте подписок после отметки FeedMarker.last_seen. Открытие ленты
+или списка уведомлений пишет в базу, только когда есть что отметить
+прочитанным, — обычный повторный GET обходится без записи.
+"""
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import (FeedMarker, Follow, Notification, NotificationState,
+                     Post)
+
+FANOUT_BATCH: int = 500
+UNREAD_CACHE_TIMEOUT: int = 60 * 60
+FEED_SEEN_INTERVAL: int = 10 * 60
+
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def feed_cache_key(user_id):
+    return f'feed:unread:{user_id}'
+
+
+def feed_seen_key(user_id):
+    return f'feed:seen:{user_id}'
+
+
+def refresh_unread(user_ids):
+    unread = Notification.objects.filter(
+        user_id=OuterRef('user_id'), is_read=False
+    ).order_by().values('user_id').annotate(total=Count('pk')).values('total')
+    NotificationState.objects.filter(user_id__in=user_ids).update(
+        unread=Coalesce(Subquery(unread), 0)
+    )
+    cache.delete_many([unread_cache_key(user_id) for user_id in user_ids])
+
+
+def refresh_feed_unread(user_ids):
+    """Пересчитывает новые посты ленты подписок после last_seen."""
+    unseen = Notification.objects.filter(
+        Q(created__gt=OuterRef('last_seen'))
+        | Q(user__feed_marker__last_seen__isnull=True),
+        user_id=OuterRef('user_id'),
+        kind=Notification.POST,
+    ).order_by().values('user_id').annotate(total=Count('pk')).values('total')
+    FeedMarker.objects.filter(user_id__in=user_ids).update(
+        unread=Coalesce(Subquery(unseen), 0)
+    )
+    cache.delete_many([feed_cache_key(user_id) for user_id in user_ids])
+
+
+def fan_out(post_id):
+    """Создаёт уведомления о посте для всех подписчиков автора."""
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return 0
+    followers = Follow.objects.filter(author_id=author_id).order_by(
+        'user_id'
+    ).values_list('user_id', flat=True)
+    total = 0
+    last_id = 0
+    while True:
+        batch = list(followers.filter(user_id__gt=last_id)[:FANOUT_BATCH])
+        if not batch:
+            return total
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                (Notification(user_id=user_id, post_id=post_id)
+                 for user_id in batch),
+                ignore_conflicts=True,
+            )
+            NotificationState.objects.bulk_create(
+                (NotificationState(user_id=user_id) for user_id in batch),
+                ignore_conflicts=True,
+            )
+            FeedMarker.objects.bulk_create(
+                (FeedMarker(user_id=user_id) for user_id in batch),
+                ignore_conflicts=True,
+            )
+            refresh_unread(batch)
+            refresh_feed_unread(batch)
+        total += len(batch)
+        last_id = batch[-1]
+
+
+def unread_count(user):
+    key = unread_cache_key(user.pk)
+    unread = cache.get(key)
+    if unread is None:
+        unread = NotificationState.objects.filter(user=user).values_list(
+            'unread', flat=True
+        ).first() or 0
+        cache.set(key, unread, UNREAD_CACHE_TIMEOUT)
+    return unread
+
+
+def mark_all_read(user):
+    """Отмечает уведомления прочитанными; без непрочитанных ничего
+    не пишет."""
+    if not unread_count(user):
+        return False
+    Notification.objects.filter(user=user, is_read=False).update(
+        is_read=True
+    )
+    NotificationState.objects.filter(user=user).update(unread=0)
+    cache.set(unread_cache_key(user.pk), 0, UNREAD_CACHE_TIMEOUT)
+    return True
+
+
+def feed_unread_count(user):
+    key = feed_cache_key(user.pk)
+    unread = cache.get(key)
+    if unread is None:
+        unread = FeedMarker.objects.filter(user=user).values_list(
+            'unread', flat=True
+        ).first() or 0
+        cache.set(key, unread, UNREAD_CACHE_TIMEOUT)
+    return unread
+
+
+def mark_feed_seen(user):
+    """Сдвигает отметку просмотра ленты подписок.
+
+    Пишет, только если в ленте есть новые посты или отметка не
+    сдвигалась дольше FEED_SEEN_INTERVAL секунд.
+    """
+    if not feed_unread_count(user) and cache.get(feed_seen_key(user.pk)):
+        return False
+    now = timezone.now()
+    if not FeedMarker.objects.filter(user=user).update(
+            last_seen=now, unread=0):
+        FeedMarker.objects.get_or_create(
+            user=user, defaults={'last_seen': now}
+        )
+    cache.set(feed_cache_key(user.pk), 0, UNREAD_CACHE_TIMEOUT)
+    cache.set(feed_seen_key(user.pk), True, FEED_SEEN_INTERVAL)
+    return True
+
+
+def build_digests(now):
+    """Письма-сводки для подписавшихся на рассылку.
+
+    Уведомления новее прошлой сводки и не новее now отбираются одним
+    запросом и читаются потоком, сгруппированные по пользователю.
+    Возвращает письма и id их получателей.
+    """
+    notifications = Notification.objects.filter(
+        Q(user__notification_state__last_digest__isnull=True)
+        | Q(created__gt=F('user__notification_state__last_digest')),
+        user__notification_state__digest=True,
+        user__email__gt='',
+        is_read=False,
+        created__lte=now,
+    ).select_related('user', 'post__author').order_by('user_id', '-created')
+    messages = []
+    user_ids = []
+    for user_id, items in groupby(
+            notifications.iterator(), key=lambda n: n.user_id):
+        items = list(items)
+        user = items[0].user
+        body = render_to_string('posts/email/digest.txt', {
+            'user': user,
+            'notifications': items,
+        })
+        messages.append(EmailMessage(
+            f'Новые посты в Yatube: {len(items)}',
+            body,
+            settings.DEFAULT_FROM_EMAIL,
+            [user.email],
+        ))
+        user_ids.append(user_id)
+    return messages, user_ids
+
+
+def send_digests():
+    """Рассылает сводки и сдвигает last_digest на момент их сборки:
+    уведомления, созданные во время рассылки, попадут в следующую."""
+    now = timezone.now()
+    messages, user_ids = build_digests(now)
+    if messages:
+        get_connection().send_messages(messages)
+    NotificationState.objects.filter(user_id__in=user_ids).update(
+        last_digest=now
+    )
+    return len(messages)
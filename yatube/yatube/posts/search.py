@@ -0,0 +1,330 @@
+"""Полнотекстовый поиск по постам.
+
+Текст приводится к нижнему регистру, «ё» заменяется на «е»,
+слова сокращаются до основы (стеммер в духе Snowball для русского
+и упрощённый суффиксный стеммер для английского). Основы хранятся
+в таблице SearchToken, поэтому поиск — это индексный поиск по основам,
+а не LIKE по всей таблице постов. Одна и та же нормализация
+применяется при индексации и при разборе запроса.
+
+Если точный поиск ничего не нашёл, запрос повторяется нечётко:
+для каждой основы по таблице TokenTrigram подбираются похожие
+основы словаря (сходство Жаккара по триграммам), и посты
+ранжируются по сумме сходства. Ранжирование и отсечение первых
+FUZZY_LIMIT постов выполняет сама база. Триграммы основ, которых не
+осталось ни в одном посте, удаляются вместе с последней основой.
+"""
+import hashlib
+import logging
+import re
+from array import array
+
+from django.core.cache import cache
+from django.db.models import (Case, Count, F, FloatField, OuterRef,
+                              Subquery, Value, When)
+
+from core.querycache import table_generations
+
+from .models import Comment, Post, SearchToken, TokenTrigram
+
+logger = logging.getLogger(__name__)
+
+TOKEN_MAX_LENGTH: int = 64
+SEARCH_CACHE_TIMEOUT: int = 10 * 60
+FUZZY_THRESHOLD: float = 0.3
+FUZZY_CANDIDATES: int = 50
+FUZZY_VARIANTS: int = 5
+FUZZY_LIMIT: int = 1000
+SEARCH_TABLES = (SearchToken._meta.db_table, TokenTrigram._meta.db_table)
+WORD = re.compile(r'[^\W_]+')
+CYRILLIC = re.compile(r'[а-я]')
+
+RU_VOWELS = 'аеиоуыэюя'
+RU_RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+RU_PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+RU_REFLEXIVE = re.compile(r'(с[яь])$')
+RU_ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+RU_PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+RU_VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|'
+    r'ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+RU_NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+RU_DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+RU_DERIVATIONAL_SUFFIX = re.compile(r'ость?$')
+RU_SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+EN_SUFFIXES = (
+    'ational', 'ization', 'fulness', 'ousness', 'iveness', 'tional',
+    'ations', 'ation', 'ingly', 'ments', 'ment', 'ness', 'ings', 'ing',
+    'edly', 'ies', 'ied', 'ed', 'es', 'ly', 's',
+)
+EN_MIN_STEM: int = 3
+EN_UNDOUBLE_AFTER = ('ing', 'ings', 'ingly', 'ed', 'edly')
+
+
+def normalize(text):
+    """Нижний регистр с учётом Unicode и «ё» → «е»."""
+    return text.casefold().replace('ё', 'е')
+
+
+def stem_russian(word):
+    match = RU_RV.match(word)
+    if not match:
+        return word
+    start, rv = match.groups()
+    without_gerund = RU_PERFECTIVE_GERUND.sub('', rv, 1)
+    if without_gerund != rv:
+        rv = without_gerund
+    else:
+        rv = RU_REFLEXIVE.sub('', rv, 1)
+        without_adjective = RU_ADJECTIVE.sub('', rv, 1)
+        if without_adjective != rv:
+            rv = RU_PARTICIPLE.sub('', without_adjective, 1)
+        else:
+            without_verb = RU_VERB.sub('', rv, 1)
+            if without_verb != rv:
+                rv = without_verb
+            else:
+                rv = RU_NOUN.sub('', rv, 1)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if RU_DERIVATIONAL.match(rv):
+        rv = RU_DERIVATIONAL_SUFFIX.sub('', rv, 1)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = RU_SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return start + rv
+
+
+def stem_english(word):
+    if word.endswith('sses'):
+        return word[:-2]
+    if word.endswith('ss'):
+        return word
+    for suffix in EN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= EN_MIN_STEM:
+            word = word[:-len(suffix)]
+            if suffix in ('ies', 'ied'):
+                word += 'y'
+            elif (suffix in EN_UNDOUBLE_AFTER and word[-1] == word[-2]
+                  and word[-1] not in 'lsz'):
+                word = word[:-1]
+            return word
+    return word
+
+
+def stem(word):
+    if CYRILLIC.search(word):
+        return stem_russian(word)
+    if word.isascii() and word.isalpha():
+        return stem_english(word)
+    return word
+
+
+def tokenize(text):
+    """Основы слов текста, без повторов, в порядке появления."""
+    tokens = {}
+    for word in WORD.findall(normalize(text or '')):
+        tokens.setdefault(stem(word)[:TOKEN_MAX_LENGTH], None)
+    return list(tokens)
+
+
+def trigrams(token):
+    """Триграммы основы с отступами по краям, как в pg_trgm."""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def index_trigrams(tokens):
+    TokenTrigram.objects.bulk_create(
+        (TokenTrigram(trigram=trigram, token=token)
+         for token in tokens for trigram in trigrams(token)),
+        ignore_conflicts=True,
+    )
+
+
+def post_tokens(post):
+    """Основы, по которым находится пост: текст, группа, автор
+    и комментарии с их авторами."""
+    author = post.author
+    parts = [
+        post.text,
+        author.username,
+        author.first_name,
+        author.last_name,
+    ]
+    if post.group_id:
+        parts.append(post.group.title)
+    comments = Comment.objects.filter(post=post).values_list(
+        'text', 'author__username'
+    )
+    for text, username in comments:
+        parts.extend((text, username))
+    return tokenize(' '.join(parts))
+
+
+def prune_trigrams(tokens=None):
+    """Удаляет триграммы основ, которых нет ни в одном посте: только
+    из переданных основ или, без них, по всему словарю."""
+    rows = TokenTrigram.objects.all()
+    used = SearchToken.objects.all()
+    if tokens is not None:
+        if not tokens:
+            return 0
+        rows = rows.filter(token__in=tokens)
+        used = used.filter(token__in=tokens)
+    deleted, _ = rows.exclude(
+        token__in=used.values('token')
+    ).delete()
+    return deleted
+
+
+def index_post(post):
+    """Перестраивает поисковые основы поста."""
+    tokens = post_tokens(post)
+    previous = SearchToken.objects.filter(post=post)
+    removed = set(previous.values_list('token', flat=True)) - set(tokens)
+    previous.delete()
+    SearchToken.objects.bulk_create(
+        SearchToken(post=post, token=token) for token in tokens
+    )
+    index_trigrams(tokens)
+    prune_trigrams(list(removed))
+
+
+def index_comment(comment):
+    """Дописывает к основам поста основы нового комментария."""
+    tokens = tokenize(f'{comment.text} {comment.author.username}')
+    SearchToken.objects.bulk_create(
+        (SearchToken(post_id=comment.post_id, token=token)
+         for token in tokens),
+        ignore_conflicts=True,
+    )
+    index_trigrams(tokens)
+
+
+def search_posts(query):
+    """Посты, в которых встречаются основы всех слов запроса."""
+    return search_tokens(tokenize(query))
+
+
+def search_tokens(tokens):
+    if not tokens:
+        return Post.objects.none()
+    matches = SearchToken.objects.filter(token__in=tokens).values(
+        'post'
+    ).annotate(
+        hits=Count('token')
+    ).filter(hits=len(tokens)).values('post')
+    return Post.objects.filter(pk__in=matches)
+
+
+def similar_tokens(token):
+    """Основы словаря, похожие на данную, со степенью сходства."""
+    grams = trigrams(token)
+    candidates = TokenTrigram.objects.filter(trigram__in=grams).values(
+        'token'
+    ).annotate(shared=Count('trigram')).order_by('-shared')
+    scored = []
+    for candidate in candidates[:FUZZY_CANDIDATES]:
+        shared = candidate['shared']
+        total = len(grams) + len(trigrams(candidate['token'])) - shared
+        score = shared / total
+        if score >= FUZZY_THRESHOLD:
+            scored.append((score, candidate['token']))
+    scored.sort(reverse=True)
+    return {token: score for score, token in scored[:FUZZY_VARIANTS]}
+
+
+def fuzzy_search_ids(tokens):
+    """id постов, где каждому слову запроса нашлась похожая основа;
+    по убыванию суммарного сходства, затем по дате.
+
+    Для каждого слова подзапрос берёт лучшее сходство среди основ
+    поста, база складывает их, сортирует и отдаёт не больше
+    FUZZY_LIMIT id.
+    """
+    posts = Post.objects.all()
+    score = Value(0.0, output_field=FloatField())
+    for number, token in enumerate(tokens):
+        variants = similar_tokens(token)
+        if not variants:
+            return []
+        matches = SearchToken.objects.filter(token__in=list(variants))
+        similarity = matches.filter(post=OuterRef('pk')).annotate(
+            similarity=Case(
+                *(When(token=variant, then=Value(value))
+                  for variant, value in variants.items()),
+                output_field=FloatField(),
+            )
+        ).order_by('-similarity').values('similarity')[:1]
+        name = f'similarity_{number}'
+        posts = posts.filter(
+            pk__in=matches.values('post')
+        ).annotate(**{name: Subquery(similarity)})
+        score = score + F(name)
+    return list(posts.annotate(similarity=score).order_by(
+        '-similarity', '-pub_date'
+    ).values_list('pk', flat=True)[:FUZZY_LIMIT])
+
+
+def search_ids(tokens):
+    """Точное совпадение основ, а если его нет — нечёткий поиск."""
+    ids = list(search_tokens(tokens).values_list('pk', flat=True))
+    return ids or fuzzy_search_ids(tokens)
+
+
+def search_cache_key(tokens):
+    """Ключ кэша не зависит от регистра, словоформ и порядка слов."""
+    digest = hashlib.md5(' '.join(sorted(tokens)).encode()).hexdigest()
+    generations = '.'.join(map(str, table_generations(SEARCH_TABLES)))
+    return f'search:{generations}:{digest}'
+
+
+def cached_search_ids(query):
+    """id найденных постов в порядке ленты.
+
+    Список хранится в кэше компактно — байтами array('I'), — поэтому
+    любая страница выдачи — это срез списка и выборка десяти постов.
+    Записи устаревают вместе с поколениями таблиц индекса (SearchToken
+    и TokenTrigram): другие изменения сайта их не сбрасывают.
+    """
+    tokens = tokenize(query)
+    ids = array('I')
+    if not tokens:
+        return ids
+    key = search_cache_key(tokens)
+    data = cache.get(key)
+    if data is None:
+        ids.extend(search_ids(tokens))
+        cache.set(key, ids.tobytes(), SEARCH_CACHE_TIMEOUT)
+    else:
+        ids.frombytes(data)
+    return ids
+
+
+def log_query(query):
+    """Пишет запрос в журнал, по которому прогревается кэш."""
+    query = ' '.join(normalize(query).split())
+    if query:
+        logger.info(query)
+
+
+def hydrate_posts(ids):
+    """Посты ленты по списку id с сохранением порядка."""
+    ids = list(ids)
+    posts = Post.objects.for_feed().in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,186 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import autocomplete
+from .cache import bump_content_version, group_cache
+from .feeds import post_scopes, touch_feeds
+from .models import Comment, Follow, Group, Post, SearchToken, User
+from .search import index_comment, index_post, prune_trigrams
+from .tags import parse_mentions, update_post_tags
+from .tasks import (fan_out_post, generate_thumbnails, notify_post_mentions,
+                    reindex_author_posts, reindex_group_posts)
+from .trending import COMMENT_WEIGHT, add_score, score_follow
+
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+AUTOCOMPLETE_USER_FIELDS = {*USER_NAME_FIELDS, 'is_active'}
+INDEXED_POST_FIELDS = {'text', 'group'}
+
+
+def update_group_stats(group_id, delta):
+    """Сдвигает счётчик постов группы и пересчитывает дату
+    последней публикации одним UPDATE."""
+    if group_id is None:
+        return
+    latest = Post.objects.filter(
+        group_id=OuterRef('pk')
+    ).order_by('-pub_date').values('pub_date')[:1]
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') + delta,
+        last_post_date=Subquery(latest),
+    )
+    group_cache.invalidate(group_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+def update_post_text(post):
+    """Теги поста и уведомления о новых упоминаниях в нём."""
+    update_post_tags(post)
+    usernames = parse_mentions(post.text)
+    if usernames:
+        digest = hashlib.md5(' '.join(usernames).encode()).hexdigest()
+        notify_post_mentions.enqueue(
+            key=f'mentions:{post.pk}:{digest}',
+            post_id=post.pk,
+            usernames=usernames,
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if created:
+        update_group_stats(instance.group_id, 1)
+        fan_out_post.enqueue(key=f'fanout:{instance.pk}', post_id=instance.pk)
+    elif previous_group_id != instance.group_id:
+        update_group_stats(previous_group_id, -1)
+        update_group_stats(instance.group_id, 1)
+    if update_fields is None or 'text' in update_fields:
+        update_post_text(instance)
+    if update_fields is None or INDEXED_POST_FIELDS & set(update_fields):
+        index_post(instance)
+    bump_content_version()
+    touch_feeds(*post_scopes(instance, previous_group_id))
+    if instance.image:
+        generate_thumbnails.enqueue(
+            key=f'thumbnail:{instance.pk}:{instance.image.name}',
+            post_id=instance.pk,
+        )
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_tokens(sender, instance, **kwargs):
+    instance._tokens = list(SearchToken.objects.filter(
+        post=instance
+    ).values_list('token', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    update_group_stats(instance.group_id, -1)
+    prune_trigrams(getattr(instance, '_tokens', []))
+    bump_content_version()
+    touch_feeds(*post_scopes(instance))
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    instance._previous_slug = instance._previous_title = None
+    if instance.pk is not None:
+        instance._previous_slug, instance._previous_title = (
+            Group.objects.filter(pk=instance.pk).values_list(
+                'slug', 'title'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    autocomplete.update_group(instance, instance._previous_slug)
+    if not created and instance._previous_title != instance.title:
+        digest = hashlib.md5(instance.title.encode()).hexdigest()
+        reindex_group_posts.enqueue(
+            key=f'reindex:group:{instance.pk}:{digest}',
+            group_id=instance.pk,
+        )
+        bump_content_version()
+        touch_feeds(f'group:{instance.pk}')
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    autocomplete.remove_group(instance.slug)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        index_comment(instance)
+        add_score(instance.post_id, COMMENT_WEIGHT)
+        bump_content_version()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    def reindex():
+        post = Post.objects.filter(pk=instance.post_id).first()
+        if post is not None:
+            index_post(post)
+            bump_content_version()
+    transaction.on_commit(reindex)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        score_follow(instance.author_id)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_names(sender, instance, update_fields=None, **kwargs):
+    instance._previous_names = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        USER_NAME_FIELDS
+    ):
+        return
+    instance._previous_names = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*USER_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous_names = getattr(instance, '_previous_names', None)
+    names = tuple(getattr(instance, field) for field in USER_NAME_FIELDS)
+    if previous_names is not None and previous_names != names:
+        digest = hashlib.md5(' '.join(names).encode()).hexdigest()
+        reindex_author_posts.enqueue(
+            key=f'reindex:author:{instance.pk}:{digest}',
+            author_id=instance.pk,
+        )
+        bump_content_version()
+        touch_feeds(f'author:{instance.pk}')
+    if (created or update_fields is None
+            or AUTOCOMPLETE_USER_FIELDS & set(update_fields)):
+        autocomplete.update_user(
+            instance, previous_names[0] if previous_names else None
+        )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    autocomplete.remove_user(instance.username)
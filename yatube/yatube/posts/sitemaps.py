@@ -0,0 +1,208 @@
+"""Карты сайта для поисковых роботов.
+
+Команда build_sitemaps пишет в SITEMAP_ROOT сжатые файлы разделов
+(posts-1.xml.gz, profiles-1.xml.gz, …) по SITEMAP_SIZE адресов и
+индекс sitemap.xml. Строки читаются пачками по возрастанию pk
+(WHERE pk > последний), а не через OFFSET, поэтому ни память, ни цена
+запроса не растут с глубиной. Посты только добавляются в конец, и
+обновление перезаписывает лишь последний неполный файл раздела; что
+уже записано, описывает манифест sitemap.json.
+"""
+import gzip
+import json
+import os
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Group, Post
+
+User = get_user_model()
+
+SITEMAP_SIZE: int = 50000
+SITEMAP_CHUNK: int = 2000
+MANIFEST = 'sitemap.json'
+INDEX = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def keyset(queryset, fields, after=0, chunk=SITEMAP_CHUNK):
+    """Словари полей строк по возрастанию pk, начиная после after."""
+    while True:
+        rows = list(queryset.filter(pk__gt=after).order_by('pk').values(
+            'pk', *fields
+        )[:chunk])
+        yield from rows
+        if len(rows) < chunk:
+            return
+        after = rows[-1]['pk']
+
+
+def w3c_date(value):
+    return value.replace(microsecond=0).isoformat()
+
+
+class Section:
+    def __init__(self, name, queryset, fields, location, lastmod=None,
+                 incremental=False):
+        self.name = name
+        self.queryset = queryset
+        self.fields = fields
+        self.location = location
+        self.lastmod = lastmod
+        self.incremental = incremental
+
+    def file_name(self, number):
+        return f'{self.name}-{number}.xml.gz'
+
+
+SECTIONS = (
+    Section(
+        'posts',
+        Post.objects.all(),
+        ('pub_date',),
+        lambda row: reverse('posts:post_detail', args=[row['pk']]),
+        lambda row: row['pub_date'],
+        incremental=True,
+    ),
+    Section(
+        'profiles',
+        User.objects.filter(is_active=True),
+        ('username',),
+        lambda row: reverse('posts:profile', args=[row['username']]),
+    ),
+    Section(
+        'groups',
+        Group.objects.all(),
+        ('slug', 'last_post_date'),
+        lambda row: reverse('posts:group_list', args=[row['slug']]),
+        lambda row: row['last_post_date'],
+    ),
+)
+
+
+def write_atomic(path, write, opener=open):
+    """Пишет файл рядом и подменяет старый одним rename: робот не
+    увидит недописанную карту."""
+    tmp = f'{path}.tmp'
+    with opener(tmp, 'wt', encoding='utf-8') as out:
+        write(out)
+    os.replace(tmp, path)
+
+
+def write_sitemap(root, name, section, base_url, rows, after):
+    """Записывает до SITEMAP_SIZE строк в один файл раздела.
+
+    Возвращает запись манифеста или None, если строк не было.
+    """
+    record = {'name': name, 'after': after, 'count': 0, 'lastmod': None}
+    lastmod = None
+
+    def write(out):
+        nonlocal lastmod
+        out.write(f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  f'<urlset xmlns="{XMLNS}">\n')
+        for row in rows:
+            location = escape(base_url + section.location(row))
+            modified = section.lastmod(row) if section.lastmod else None
+            if modified is None:
+                out.write(f'<url><loc>{location}</loc></url>\n')
+            else:
+                lastmod = max(lastmod or modified, modified)
+                out.write(f'<url><loc>{location}</loc>'
+                          f'<lastmod>{w3c_date(modified)}</lastmod></url>\n')
+            record['count'] += 1
+            record['last_pk'] = row['pk']
+        out.write('</urlset>\n')
+
+    path = os.path.join(root, name)
+    write_atomic(path, write, gzip.open)
+    if not record['count']:
+        os.remove(path)
+        return None
+    record['lastmod'] = lastmod and w3c_date(lastmod)
+    return record
+
+
+def write_section(section, root, base_url, number=1, after=0):
+    """Файлы раздела, начиная с номера number и строк после after."""
+    rows = keyset(section.queryset, section.fields, after=after)
+    files = []
+    while True:
+        record = write_sitemap(
+            root, section.file_name(number), section, base_url,
+            islice(rows, SITEMAP_SIZE), after,
+        )
+        if record is None:
+            break
+        files.append(record)
+        if record['count'] < SITEMAP_SIZE:
+            break
+        after = record['last_pk']
+        number += 1
+    return files
+
+
+def write_index(root, base_url, manifest):
+    generated = w3c_date(timezone.now())
+
+    def write(out):
+        out.write(f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  f'<sitemapindex xmlns="{XMLNS}">\n')
+        for files in manifest.values():
+            for record in files:
+                location = escape(base_url + reverse(
+                    'posts:sitemap_section', args=[record['name']]
+                ))
+                out.write(f'<sitemap><loc>{location}</loc>'
+                          f'<lastmod>{record["lastmod"] or generated}'
+                          f'</lastmod></sitemap>\n')
+        out.write('</sitemapindex>\n')
+
+    write_atomic(os.path.join(root, INDEX), write)
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST), encoding='utf-8') as source:
+            return json.load(source)
+    except FileNotFoundError:
+        return {}
+
+
+def build_sitemaps(root, base_url, full=False):
+    """Строит или дополняет карты сайта; возвращает манифест.
+
+    Без full растущие разделы переписываются с последнего файла,
+    остальные — целиком. Полная сборка нужна, чтобы убрать из карт
+    удалённые посты.
+    """
+    os.makedirs(root, exist_ok=True)
+    base_url = base_url.rstrip('/')
+    previous = {} if full else load_manifest(root)
+    manifest = {}
+    for section in SECTIONS:
+        kept = previous.get(section.name, []) if section.incremental else []
+        if kept:
+            last = kept.pop()
+            files = write_section(
+                section, root, base_url, len(kept) + 1, last['after']
+            )
+        else:
+            files = write_section(section, root, base_url)
+        manifest[section.name] = kept + files
+    written = {
+        record['name'] for files in manifest.values() for record in files
+    }
+    for name in os.listdir(root):
+        if name.endswith('.xml.gz') and name not in written:
+            os.remove(os.path.join(root, name))
+    write_index(root, base_url, manifest)
+    write_atomic(
+        os.path.join(root, MANIFEST),
+        lambda out: json.dump(manifest, out, indent=1),
+    )
+    return manifest
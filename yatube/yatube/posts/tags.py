@@ -0,0 +1,72 @@
+"""Теги (#тег) и упоминания (@username) в тексте постов.
+
+При сохранении поста теги из текста раскладываются по таблицам Tag и
+PostTag, и лента тега — это чтение индекса (tag, -pub_date), а не
+поиск подстроки по всем текстам. Упомянутые пользователи получают
+уведомление, если не отключили их.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+
+from .models import Notification, NotificationState, Post, PostTag, Tag
+from .notifications import refresh_unread
+
+User = get_user_model()
+
+TAG = re.compile(r'(?<![\w&#])#(\w{1,64})')
+MENTION = re.compile(r'(?<![\w@])@(\w[\w.+-]{0,148}\w|\w)')
+
+
+def parse_tags(text):
+    return sorted({name.lower() for name in TAG.findall(text)})
+
+
+def parse_mentions(text):
+    return sorted(set(MENTION.findall(text)))
+
+
+def update_post_tags(post):
+    """Приводит теги поста в соответствие с его текстом."""
+    names = parse_tags(post.text)
+    PostTag.objects.filter(post=post).exclude(tag__name__in=names).delete()
+    if not names:
+        return
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    tag_ids = Tag.objects.filter(name__in=names).values_list('pk', flat=True)
+    PostTag.objects.bulk_create(
+        [PostTag(post=post, tag_id=tag_id, pub_date=post.pub_date)
+         for tag_id in tag_ids],
+        ignore_conflicts=True,
+    )
+
+
+def notify_mentions(post_id, usernames):
+    """Уведомления упомянутым в посте, кроме автора и отключивших
+    их; повторное упоминание нового уведомления не создаёт."""
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return 0
+    user_ids = list(User.objects.filter(username__in=usernames).exclude(
+        pk=author_id
+    ).exclude(notification_state__mentions=False).values_list(
+        'pk', flat=True
+    ))
+    if not user_ids:
+        return 0
+    Notification.objects.bulk_create(
+        [Notification(user_id=user_id, post_id=post_id,
+                      kind=Notification.MENTION)
+         for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    NotificationState.objects.bulk_create(
+        [NotificationState(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    refresh_unread(user_ids)
+    return len(user_ids)
@@ -0,0 +1,61 @@
+from sorl.thumbnail import get_thumbnail
+
+from jobs.registry import task
+
+from . import autocomplete
+from .models import Post
+from .cache import bump_content_version
+from .notifications import fan_out
+from .search import index_post
+from .tags import notify_mentions
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task()
+def generate_thumbnails(post_id):
+    """Готовит миниатюру заранее, чтобы её не строил рендер ленты."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task(priority=5)
+def fan_out_post(post_id):
+    """Уведомления о новом посте для подписчиков автора."""
+    fan_out(post_id)
+
+
+@task()
+def notify_post_mentions(post_id, usernames):
+    """Уведомления пользователям, упомянутым в посте."""
+    notify_mentions(post_id, usernames)
+
+
+@task()
+def rebuild_autocomplete():
+    """Новый снимок индекса подсказок вместо накопленных изменений."""
+    autocomplete.rebuild()
+
+
+def reindex_posts(posts):
+    for post in posts.iterator():
+        index_post(post)
+    bump_content_version()
+
+
+@task()
+def reindex_group_posts(group_id):
+    """Поисковые основы постов группы после смены её названия."""
+    reindex_posts(Post.objects.filter(group_id=group_id).select_related(
+        'author', 'group'
+    ))
+
+
+@task()
+def reindex_author_posts(author_id):
+    """Поисковые основы постов автора после смены его имени."""
+    reindex_posts(Post.objects.filter(author_id=author_id).select_related(
+        'author', 'group'
+    ))
@@ -0,0 +1,32 @@
+import re
+
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+from posts.tags import MENTION, TAG
+
+register = template.Library()
+
+TOKEN = re.compile(f'{TAG.pattern}|{MENTION.pattern}')
+
+
+@register.filter(needs_autoescape=True)
+def linkify(text, autoescape=True):
+    """Превращает #теги и @упоминания в тексте поста в ссылки."""
+    escape = conditional_escape if autoescape else str
+    parts, last = [], 0
+    for match in TOKEN.finditer(text):
+        tag, username = match.groups()
+        if tag:
+            url = reverse('posts:tag', args=[tag.lower()])
+        else:
+            url = reverse('posts:profile', args=[username])
+        parts += [
+            escape(text[last:match.start()]),
+            format_html('<a href="{}">{}</a>', url, match.group(0)),
+        ]
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return mark_safe(''.join(parts))
@@ -0,0 +1,164 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+
+from .. import autocomplete
+from ..autocomplete import PrefixIndex
+from ..models import Group
+
+User = get_user_model()
+
+
+class PrefixIndexTest(TestCase):
+    def test_search_by_prefix_of_any_word(self):
+        """Префикс находит имя с начала любого слова."""
+        index = PrefixIndex()
+        index.add('user', 'leo', 'Лев Толстой', ('leo', 'Лев Толстой'))
+        index.add('user', 'fedor', 'Фёдор', ('fedor', 'Фёдор'))
+        self.assertEqual(
+            index.search('тол'), [('user', 'leo', 'Лев Толстой')]
+        )
+        self.assertEqual(index.search('ФЕД'), [('user', 'fedor', 'Фёдор')])
+        self.assertEqual(index.search('x'), [])
+
+    def test_snapshot_round_trip(self):
+        """Снимок индекса восстанавливается без потерь."""
+        index = PrefixIndex()
+        index.add('group', 'cats', 'Коты', ('Коты',))
+        restored = PrefixIndex.loads(index.dumps())
+        self.assertEqual(restored.entries, index.entries)
+        restored.discard('group', 'cats')
+        self.assertEqual(restored.entries, [])
+
+
+class AutocompleteViewTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        autocomplete._local.update(
+            snapshot=None, seq=0, index=None, scheduled=None
+        )
+        self.client = Client()
+
+    def suggest(self, query):
+        response = self.client.get(
+            reverse('posts:autocomplete'), {'q': query}
+        )
+        return [item['url'] for item in response.json()['results']]
+
+    def test_signals_update_index(self):
+        """Новые, переименованные и удалённые записи сразу видны
+        в подсказках."""
+        user = User.objects.create_user(username='dostoevsky')
+        group = Group.objects.create(
+            title='Достопримечательности',
+            slug='sights',
+            description='Тестовое описание',
+        )
+        self.assertEqual(
+            self.suggest('дос'),
+            [reverse('posts:group_list', kwargs={'slug': 'sights'})]
+        )
+        self.assertEqual(
+            self.suggest('dost'),
+            [reverse('posts:profile', kwargs={'username': 'dostoevsky'})]
+        )
+        user.username = 'fyodor'
+        user.save()
+        self.assertEqual(self.suggest('dost'), [])
+        group.delete()
+        self.assertEqual(self.suggest('дос'), [])
+
+    def test_index_rebuilt_from_snapshot_of_other_process(self):
+        """Процесс подхватывает снимок, опубликованный другим."""
+        Group.objects.create(
+            title='Кино', slug='cinema', description='Тестовое описание'
+        )
+        autocomplete.rebuild()
+        autocomplete._local.update(snapshot=None, seq=0, index=None)
+        self.assertEqual(len(self.suggest('кин')), 1)
+
+    def test_snapshot_is_stored_in_chunks(self):
+        """Снимок больше одной части собирается обратно без потерь."""
+        for i in range(20):
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}', description='-'
+            )
+        with patch.object(autocomplete, 'SNAPSHOT_CHUNK', 64):
+            index = autocomplete.rebuild()
+        self.assertGreater(cache.get(autocomplete.SNAPSHOT_KEY)[2], 1)
+        autocomplete._local.update(snapshot=None, seq=0, index=None)
+        self.assertEqual(autocomplete.get_index().entries, index.entries)
+
+    def test_unwritten_snapshot_is_not_published(self):
+        """Если часть снимка не записалась, описание не публикуется."""
+        with patch.object(cache, 'set_many', return_value=['lost']):
+            with self.assertRaises(RuntimeError):
+                autocomplete.rebuild()
+        self.assertIsNone(cache.get(autocomplete.SNAPSHOT_KEY))
+
+    @override_settings(JOBS_EAGER=False)
+    def test_cold_process_falls_back_to_database(self):
+        """Без снимка подсказки ищутся в базе, а не по одному журналу
+        изменений."""
+        Group.objects.create(
+            title='Кино', slug='cinema', description='Тестовое описание'
+        )
+        cache.clear()
+        self.assertEqual(
+            self.suggest('Ки'),
+            [reverse('posts:group_list', kwargs={'slug': 'cinema'})]
+        )
+        self.assertIsNone(autocomplete._local['index'])
+        self.assertTrue(Job.objects.filter(
+            name='posts.tasks.rebuild_autocomplete'
+        ).exists())
+
+    def test_long_backlog_keeps_last_index(self):
+        """При отставании больше COMPACT_AFTER процесс не применяет
+        изменения в запросе, а отвечает по последнему индексу."""
+        Group.objects.create(
+            title='Кино', slug='cinema', description='Тестовое описание'
+        )
+        self.assertEqual(len(self.suggest('кин')), 1)
+        with patch.object(autocomplete, 'COMPACT_AFTER', 1):
+            Group.objects.create(
+                title='Кинотеатр', slug='theatre', description='-'
+            )
+            Group.objects.create(
+                title='Кинохроника', slug='chronicle', description='-'
+            )
+            with patch.object(cache, 'get_many') as get_many, \
+                    patch.object(autocomplete, 'schedule_rebuild') as rebuild:
+                self.assertEqual(len(self.suggest('кин')), 1)
+            get_many.assert_not_called()
+            rebuild.assert_called_once_with()
+
+    def test_cold_cache_schedules_rebuild(self):
+        """Без снимка индекс строит задача очереди, а не запрос."""
+        Group.objects.create(
+            title='Кино', slug='cinema', description='Тестовое описание'
+        )
+        cache.clear()
+        autocomplete._local.update(snapshot=None, seq=0, index=None)
+        self.assertEqual(len(self.suggest('кин')), 1)
+        self.assertTrue(Job.objects.filter(
+            name='posts.tasks.rebuild_autocomplete', status=Job.DONE
+        ).exists())
+
+    def test_same_names_have_distinct_ids(self):
+        """Тёзки различаются в подсказках по id и тексту."""
+        User.objects.create_user(username='ivan1', first_name='Иван')
+        User.objects.create_user(username='ivan2', first_name='Иван')
+        results = self.client.get(
+            reverse('posts:autocomplete'), {'q': 'иван'}
+        ).json()['results']
+        self.assertEqual(
+            {item['id'] for item in results}, {'user:ivan1', 'user:ivan2'}
+        )
+        self.assertEqual(len({item['text'] for item in results}), 2)
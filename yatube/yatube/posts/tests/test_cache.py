@@ -0,0 +1,154 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import Http404
+from django.test import TestCase
+
+from core.querycache import use_query_cache
+
+from ..cache import group_cache, post_cache, user_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ObjectCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(author=ObjectCacheTest.author, text=f'Пост {i}')
+            for i in range(3)
+        )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_lookup_by_key_is_read_through(self):
+        """Повторное чтение по slug и username не ходит в базу."""
+        group_cache.get(slug='test-slug')
+        user_cache.get(username='Auth')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                group_cache.get(slug='test-slug'), ObjectCacheTest.group
+            )
+            self.assertEqual(
+                user_cache.get(username='Auth'), ObjectCacheTest.author
+            )
+        self.assertEqual(group_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_get_many_loads_misses_in_one_query(self):
+        """Промахи списка id дочитываются одним запросом."""
+        first, *rest = [post.pk for post in Post.objects.all()]
+        post_cache.get(first)
+        with self.assertNumQueries(1):
+            posts = post_cache.get_many([first, *rest, 0])
+        self.assertEqual(sorted(posts), sorted([first, *rest]))
+        self.assertEqual(post_cache.stats(), {'hits': 1, 'misses': 4})
+
+    def test_save_and_slug_change_invalidate(self):
+        """Изменение объекта сбрасывает кэш, старый slug не находится."""
+        group = Group.objects.get(pk=ObjectCacheTest.group.pk)
+        group_cache.get(slug='test-slug')
+        group.slug = 'new-slug'
+        group.save()
+        self.assertEqual(group_cache.get(slug='new-slug').slug, 'new-slug')
+        with self.assertRaises(Group.DoesNotExist):
+            group_cache.get(slug='test-slug')
+
+    def test_delete_invalidates(self):
+        """Удалённый объект не отдаётся из кэша."""
+        post = Post.objects.create(author=ObjectCacheTest.author, text='X')
+        pk = post.pk
+        post_cache.get(pk)
+        post.delete()
+        with self.assertRaises(Post.DoesNotExist):
+            post_cache.get(pk)
+
+    def test_user_is_cached_without_password(self):
+        """Хэш пароля не хранится в кэше пользователей."""
+        user_cache.get(username='Auth')
+        cached = cache.get(user_cache.key(ObjectCacheTest.author.pk))
+        self.assertEqual(cached.get_deferred_fields(), {'password'})
+        self.assertNotIn('password', cached.__dict__)
+
+    def test_bad_pk_and_bad_lookup(self):
+        """Неверный pk — это 404, а неизвестное поле — ошибка кода."""
+        with self.assertRaises(Http404):
+            post_cache.get_or_404('abc')
+        with self.assertRaises(ValueError):
+            user_cache.get_or_404(email='auth@example.com')
+
+    def test_cache_stats_command(self):
+        """Команда выводит счётчики и умеет их обнулять."""
+        user_cache.get(username='Auth')
+        out = StringIO()
+        call_command('cache_stats', '--reset', stdout=out)
+        self.assertIn('auth.user: попаданий 0, промахов 1', out.getvalue())
+        self.assertEqual(user_cache.stats(), {'hits': 0, 'misses': 0})
+
+
+class QueryCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=QueryCacheTest.author,
+            group=QueryCacheTest.group,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_repeated_query_is_served_from_cache(self):
+        """Одинаковый запрос и его count() читаются из кэша."""
+        list(Post.objects.for_feed().cache())
+        Post.objects.for_feed().cache().count()
+        with self.assertNumQueries(0):
+            posts = list(Post.objects.for_feed().cache())
+            self.assertEqual(Post.objects.for_feed().cache().count(), 1)
+        self.assertEqual(posts[0].group.title, 'Тестовая группа')
+
+    def test_write_to_any_read_table_invalidates(self):
+        """Запись в любую таблицу запроса, даже через update(),
+        меняет её поколение."""
+        list(Post.objects.for_feed().cache())
+        Group.objects.filter(pk=QueryCacheTest.group.pk).update(
+            title='Новое название'
+        )
+        with self.assertNumQueries(1):
+            posts = list(Post.objects.for_feed().cache())
+        self.assertEqual(posts[0].group.title, 'Новое название')
+        Post.objects.create(author=QueryCacheTest.author, text='Новый')
+        self.assertEqual(Post.objects.cache().count(), 2)
+
+    def test_cache_is_opt_in_per_view(self):
+        """Без .cache() запрос кэшируется только внутри use_query_cache."""
+        list(Post.objects.all())
+        with self.assertNumQueries(1):
+            list(Post.objects.all())
+
+        @use_query_cache
+        def view(request):
+            return list(Post.objects.all()), list(Post.objects.nocache())
+
+        view(None)
+        with self.assertNumQueries(1):
+            view(None)
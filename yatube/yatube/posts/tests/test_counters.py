@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..counters import buffer
+from ..models import Post, PostScore, PostViews
+from ..trending import VIEW_WEIGHT
+
+User = get_user_model()
+
+
+class ViewCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        buffer.drain()
+        self.url = reverse('posts:post_detail', args=[ViewCounterTest.post.pk])
+
+    def test_views_are_buffered_and_flushed_in_batch(self):
+        """Просмотры, в том числе из кэша страниц, пишутся в базу только
+        при сбросе буфера; зрители считаются по скетчу."""
+        readers = [Client() for _ in range(3)]
+        for i, client in enumerate(readers):
+            client.force_login(User.objects.create_user(username=f'R{i}'))
+        for client in readers + readers:
+            client.get(self.url)
+        self.assertFalse(PostViews.objects.exists())
+        with self.assertNumQueries(10):
+            self.assertEqual(buffer.flush(), 1)
+        stats = PostViews.objects.get(post=ViewCounterTest.post)
+        self.assertEqual((stats.views, stats.uniques), (6, 3))
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=ViewCounterTest.post).score,
+            6 * VIEW_WEIGHT
+        )
+        readers[0].get(self.url)
+        buffer.flush()
+        stats.refresh_from_db()
+        self.assertEqual((stats.views, stats.uniques), (7, 3))
+
+    def test_failed_flush_keeps_views(self):
+        """Ошибка записи не теряет просмотры и не ломает страницу."""
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with patch('posts.counters.write_views', side_effect=OperationalError):
+            with self.assertLogs('posts.counters', 'ERROR'):
+                self.assertEqual(buffer.flush(), 0)
+        self.client.get(self.url)
+        self.assertEqual(buffer.flush(), 1)
+        stats = PostViews.objects.get(post=ViewCounterTest.post)
+        self.assertEqual((stats.views, stats.uniques), (2, 1))
+
+    def test_deleted_post_is_skipped(self):
+        post = Post.objects.create(author=ViewCounterTest.author, text='X')
+        buffer.record(post.pk, 'ip:1')
+        post.delete()
+        buffer.flush()
+        self.assertFalse(PostViews.objects.exists())
+
+    def test_counts_shown_on_post_page(self):
+        buffer.record(ViewCounterTest.post.pk, 'ip:1')
+        buffer.flush()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Просмотров: 1')
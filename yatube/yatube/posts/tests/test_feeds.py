@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import FeedVersion, Group, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='Классика', slug='classic', description='Старые книги'
+        )
+        Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост в группе'
+        )
+        Post.objects.create(author=cls.other, text='Пост без группы')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_feeds_cover_their_scope(self):
+        cases = {
+            reverse('posts:feed', args=['rss']): (2, 'application/rss+xml'),
+            reverse('posts:group_feed', args=['classic', 'atom']): (
+                1, 'application/atom+xml'
+            ),
+            reverse('posts:profile_feed', args=['Other', 'rss']): (
+                1, 'application/rss+xml'
+            ),
+        }
+        for url, (count, content_type) in cases.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                content = response.content.decode()
+                self.assertEqual(
+                    content.count('<item>') + content.count('<entry>'), count
+                )
+        response = self.client.get(
+            reverse('posts:group_feed', args=['classic', 'atom'])
+        )
+        self.assertContains(response, 'Лев Толстой: Пост в группе')
+        self.assertEqual(
+            self.client.get(reverse('posts:feed', args=['json'])).status_code,
+            404
+        )
+
+    def test_conditional_get_and_invalidation(self):
+        """Повторный опрос получает 304 за один запрос версии ленты,
+        а новый пост меняет ETag только у своих лент."""
+        site = reverse('posts:feed', args=['atom'])
+        other = reverse('posts:profile_feed', args=['Other', 'atom'])
+        response = self.client.get(site)
+        etag = response['ETag']
+        other_etag = self.client.get(other)['ETag']
+        with self.assertNumQueries(3):
+            response = self.client.get(site, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get(site)
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(
+                site, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=FeedTest.author, text='Новый пост')
+        response = self.client.get(site, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
+        response = self.client.get(other, HTTP_IF_NONE_MATCH=other_etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_version_is_shared_without_cache(self):
+        """Версия ленты живёт в базе: процесс с пустым кэшем видит
+        ту же версию и не отвечает 304 на устаревший ETag."""
+        site = reverse('posts:feed', args=['rss'])
+        etag = self.client.get(site)['ETag']
+        cache.clear()
+        response = self.client.get(site, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        FeedVersion.objects.filter(scope='site').update(
+            version=F('version') + 1
+        )
+        response = self.client.get(site, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_body_keeps_request_host(self):
+        """Закэшированная лента не отдаёт ссылки на чужой хост."""
+        site = reverse('posts:feed', args=['rss'])
+        self.client.get(site, HTTP_HOST='localhost')
+        response = self.client.get(site, secure=True, HTTP_HOST='127.0.0.1')
+        self.assertContains(response, 'https://127.0.0.1/')
+        self.assertNotContains(response, 'localhost')
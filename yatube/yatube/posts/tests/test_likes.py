@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..likes import LIKE_SHARDS, bump_counter, like_counts
+from ..models import Like, LikeCounter, Post
+
+User = get_user_model()
+
+
+class LikeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}') for i in range(5)
+        )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(LikeTest.reader)
+        self.post = Post.objects.filter(author=LikeTest.author).first()
+        self.url = reverse('posts:like', args=[self.post.pk])
+
+    def test_like_is_idempotent(self):
+        """Повторная отметка и повторное снятие ничего не меняют."""
+        for _ in range(2):
+            self.client.post(self.url, {'liked': '1'})
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(like_counts([self.post.pk]), {self.post.pk: 1})
+        for _ in range(2):
+            self.client.post(self.url, {'liked': '0'})
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(like_counts([self.post.pk]), {self.post.pk: 0})
+
+    def test_counter_is_split_into_shards(self):
+        for _ in range(200):
+            bump_counter(self.post.pk, 1)
+        shards = LikeCounter.objects.filter(post=self.post)
+        self.assertGreater(shards.count(), 1)
+        self.assertLessEqual(shards.count(), LIKE_SHARDS)
+        self.assertEqual(like_counts([self.post.pk]), {self.post.pk: 200})
+
+    def test_redirects_back_to_safe_page(self):
+        index = reverse('posts:index')
+        response = self.client.post(self.url, {'liked': '1', 'next': index})
+        self.assertRedirects(response, index)
+        response = self.client.post(
+            self.url, {'liked': '1', 'next': 'https://example.com/'}
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk])
+        )
+
+    def test_get_is_not_allowed(self):
+        """Отметку меняет только POST."""
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.assertEqual(like_counts([self.post.pk]), {})
+
+    def test_feed_reads_like_state_for_page_at_once(self):
+        """Кнопки всей ленты стоят двух запросов независимо от числа
+        постов на странице; третий — чтение сессии."""
+        self.client.post(self.url, {'liked': '1'})
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '♥ 1', count=1)
+        self.assertContains(response, '♥ 0', count=len(LikeTest.posts) - 1)
+        self.assertContains(response, 'btn-danger">', count=1)
@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import EXCERPT_WORDS, Group, Post
 
 User = get_user_model()
 POST_LIMIT: int = 15
@@ -35,3 +35,60 @@ class PostModelTest(TestCase):
         for value, expected in object_names.items():
             with self.subTest(value=value):
                 self.assertEqual(value, expected)
+
+    def test_post_excerpt_updated_on_save(self):
+        """Анонс поста пересчитывается при сохранении текста."""
+        post = PostModelTest.post
+        self.assertEqual(post.excerpt, post.text)
+        post.text = ' '.join(['слово'] * (EXCERPT_WORDS + 5))
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(
+            post.excerpt,
+            ' '.join(['слово'] * EXCERPT_WORDS) + ' …'
+        )
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Первая группа',
+            slug='first',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second',
+            description='Тестовое описание',
+        )
+
+    def test_group_stats_follow_posts(self):
+        """Счётчик постов и дата последней публикации группы
+        обновляются при создании, переносе и удалении поста."""
+        group = GroupStatsTest.group
+        other_group = GroupStatsTest.other_group
+        post = Post.objects.create(
+            author=GroupStatsTest.user,
+            text='Тестовый пост',
+            group=group,
+        )
+        group.refresh_from_db()
+        self.assertEqual(group.posts_count, 1)
+        self.assertEqual(group.last_post_date, post.pub_date)
+
+        post.group = other_group
+        post.save()
+        group.refresh_from_db()
+        other_group.refresh_from_db()
+        self.assertEqual(group.posts_count, 0)
+        self.assertIsNone(group.last_post_date)
+        self.assertEqual(other_group.posts_count, 1)
+        self.assertEqual(other_group.last_post_date, post.pub_date)
+
+        post.delete()
+        other_group.refresh_from_db()
+        self.assertEqual(other_group.posts_count, 0)
+        self.assertIsNone(other_group.last_post_date)
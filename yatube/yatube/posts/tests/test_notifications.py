@@ -0,0 +1,132 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Follow, Notification, NotificationState, Post
+from ..notifications import (build_digests, fan_out, feed_unread_count,
+                             send_digests, unread_count)
+
+User = get_user_model()
+
+
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'Reader{i}', email=f'reader{i}@example.com'
+            )
+            for i in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=NotificationTest.author)
+            for reader in NotificationTest.readers
+        )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(NotificationTest.readers[0])
+
+    def test_new_post_notifies_every_follower_once(self):
+        """Новый пост создаёт по уведомлению на подписчика, а повторная
+        раскладка не удваивает счётчики."""
+        post = Post.objects.create(author=NotificationTest.author, text='Пост')
+        fan_out(post.pk)
+        self.assertEqual(
+            Notification.objects.filter(post=post).count(),
+            len(NotificationTest.readers)
+        )
+        for reader in NotificationTest.readers:
+            with self.subTest(reader=reader):
+                self.assertEqual(unread_count(reader), 1)
+
+    def test_header_count_and_reading(self):
+        """Шапка показывает число непрочитанных, страница их прочитывает."""
+        Post.objects.create(author=NotificationTest.author, text='Пост')
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertContains(response, '<span class="badge bg-danger">1</span>')
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(unread_count(NotificationTest.readers[0]), 0)
+        self.assertFalse(
+            Notification.objects.filter(
+                user=NotificationTest.readers[0], is_read=False
+            ).exists()
+        )
+
+    def test_feed_unread_counts_posts_after_last_visit(self):
+        """Счётчик ленты растёт с новыми постами и сбрасывается её
+        открытием; повторная раскладка его не удваивает."""
+        reader = NotificationTest.readers[0]
+        post = Post.objects.create(author=NotificationTest.author, text='1')
+        fan_out(post.pk)
+        self.assertEqual(feed_unread_count(reader), 1)
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(feed_unread_count(reader), 0)
+        Post.objects.create(author=NotificationTest.author, text='2')
+        Post.objects.create(author=NotificationTest.author, text='3')
+        with self.assertNumQueries(2):
+            response = self.reader_client.get(reverse('posts:follow_unread'))
+        self.assertEqual(response.json(), {'unread': 2})
+        response = self.reader_client.head(reverse('posts:follow_unread'))
+        self.assertEqual(response['X-Unread-Count'], '2')
+        self.assertEqual(response.content, b'')
+
+    def test_repeated_visits_do_not_write(self):
+        """Повторное открытие ленты и уведомлений без нового ничего
+        не пишет в базу."""
+        Post.objects.create(author=NotificationTest.author, text='Пост')
+        for name in ('posts:follow_index', 'posts:notifications'):
+            with self.subTest(page=name):
+                self.reader_client.get(reverse(name))
+                with CaptureQueriesContext(connection) as queries:
+                    self.reader_client.get(reverse(name))
+                self.assertFalse([
+                    query for query in queries.captured_queries
+                    if query['sql'].lstrip().startswith(
+                        ('INSERT', 'UPDATE', 'DELETE')
+                    )
+                ])
+
+    def test_digest_is_sent_once_to_subscribers(self):
+        """Сводка уходит только включившим её и только один раз."""
+        self.reader_client.post(reverse('posts:notifications_digest'))
+        Post.objects.create(author=NotificationTest.author, text='Пост')
+        call_command('send_digest', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader0@example.com'])
+        self.assertIn('Пост', mail.outbox[0].body)
+        call_command('send_digest', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(NotificationState.objects.get(
+            user=NotificationTest.readers[0]
+        ).digest)
+
+    def test_digest_skips_notifications_after_its_start(self):
+        """Уведомления новее момента сборки уходят со следующей сводкой."""
+        self.reader_client.post(reverse('posts:notifications_digest'))
+        Post.objects.create(author=NotificationTest.author, text='Старый')
+        started = timezone.now()
+        Post.objects.create(author=NotificationTest.author, text='Новый')
+        messages, user_ids = build_digests(started)
+        self.assertEqual(user_ids, [NotificationTest.readers[0].pk])
+        self.assertIn('Старый', messages[0].body)
+        self.assertNotIn('Новый', messages[0].body)
+        NotificationState.objects.filter(user_id__in=user_ids).update(
+            last_digest=started
+        )
+        self.assertEqual(send_digests(), 1)
+        self.assertIn('Новый', mail.outbox[0].body)
+        self.assertNotIn('Старый', mail.outbox[0].body)
@@ -0,0 +1,220 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.worker import work
+
+from ..cache import bump_content_version
+from ..models import (Comment, Follow, Group, Post, SearchToken,
+                      TokenTrigram)
+from ..search import (cached_search_ids, fuzzy_search_ids, index_post,
+                      normalize, tokenize)
+from ..utils import POST_LIMIT
+
+User = get_user_model()
+
+
+class TokenizeTest(TestCase):
+    def test_normalize_folds_case_and_yo(self):
+        """Нормализация приводит регистр кириллицы и «ё» к «е»."""
+        self.assertEqual(normalize('ЁЛКА Пост'), 'елка пост')
+
+    def test_word_forms_share_stem(self):
+        """Словоформы сводятся к одной основе."""
+        cases = {
+            'Пост посты постами ПОСТОВ': ['пост'],
+            'красивейший красивые красивая': ['красив'],
+            'Running runs': ['run'],
+            'ponies pony': ['pony'],
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(tokenize(text), expected)
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.group = Group.objects.create(
+            title='Путешествия',
+            slug='travel',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=SearchViewTest.author,
+            text='Ёжики зимой спят в норах',
+            group=SearchViewTest.group,
+        )
+        cls.other_post = Post.objects.create(
+            author=User.objects.create_user(username='Other'),
+            text='Совсем другой текст',
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.guest_client = Client()
+        cache.clear()
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse('posts:index'), {'search': query}
+        )
+        return list(response.context['page_obj'])
+
+    def test_search_ignores_case_yo_and_word_form(self):
+        """Поиск находит пост без учёта регистра, «ё» и словоформы."""
+        queries = ['ежик', 'ЁЖИК НОРА', 'толстого', 'путешествие']
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [SearchViewTest.post])
+
+    def test_search_requires_every_word(self):
+        """Пост должен содержать основы всех слов запроса."""
+        self.assertEqual(self.search('ежики другой'), [])
+
+    def test_new_comment_is_searchable(self):
+        """Текст нового комментария попадает в индекс поста."""
+        Comment.objects.create(
+            post=SearchViewTest.other_post,
+            author=SearchViewTest.author,
+            text='Отличная фотография',
+        )
+        self.assertEqual(
+            self.search('фотографии'), [SearchViewTest.other_post]
+        )
+
+    def test_typo_falls_back_to_trigrams(self):
+        """Запрос с опечатками находит пост по похожим основам."""
+        queries = ['путишествия', 'толстово зимой']
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [SearchViewTest.post])
+
+    def test_fuzzy_search_ranks_by_similarity(self):
+        """Более похожее совпадение стоит в выдаче выше."""
+        closer = Post.objects.create(
+            author=SearchViewTest.author,
+            text='Путешествовали по горам',
+        )
+        self.assertEqual(
+            self.search('путешевствовали'), [closer, SearchViewTest.post]
+        )
+
+    def test_fuzzy_search_is_limited(self):
+        """Нечёткая выдача не длиннее FUZZY_LIMIT."""
+        Post.objects.bulk_create(
+            Post(author=SearchViewTest.author, text='Путешествие')
+            for _ in range(3)
+        )
+        for post in Post.objects.filter(text='Путешествие'):
+            index_post(post)
+        with patch('posts.search.FUZZY_LIMIT', 2):
+            self.assertEqual(len(fuzzy_search_ids(tokenize('путишествия'))), 2)
+
+    def test_unused_trigrams_are_pruned(self):
+        """Триграммы пропавшей основы удаляются вместе с ней."""
+        post = SearchViewTest.other_post
+        post.text = 'Новый текст про котов'
+        post.save()
+        self.assertFalse(
+            TokenTrigram.objects.filter(token='совс').exists()
+        )
+        self.assertTrue(TokenTrigram.objects.filter(token='кот').exists())
+        post.delete()
+        self.assertFalse(TokenTrigram.objects.filter(token='кот').exists())
+
+    def test_post_edit_rebuilds_tokens(self):
+        """Правка поста перестраивает его основы."""
+        post = SearchViewTest.other_post
+        post.text = 'Новый текст про котов'
+        post.save()
+        self.assertTrue(
+            SearchToken.objects.filter(post=post, token='кот').exists()
+        )
+        self.assertFalse(
+            SearchToken.objects.filter(post=post, token='совс').exists()
+        )
+
+    def test_unrelated_field_save_skips_indexing(self):
+        """Сохранение полей, которых нет в индексе, его не трогает."""
+        post = SearchViewTest.other_post
+        post.text = 'Текст без переиндексации'
+        with patch('posts.signals.index_post') as index:
+            post.save(update_fields=['image'])
+        index.assert_not_called()
+
+    @override_settings(JOBS_EAGER=False)
+    def test_rename_reindexes_in_background(self):
+        """Переименование группы переиндексирует посты задачей
+        очереди, а не при сохранении."""
+        group = Group.objects.get(pk=SearchViewTest.group.pk)
+        group.title = 'Приключения'
+        group.save()
+        self.assertFalse(SearchToken.objects.filter(
+            post=SearchViewTest.post, token='приключен'
+        ).exists())
+        self.assertEqual(work(once=True), 1)
+        self.assertTrue(SearchToken.objects.filter(
+            post=SearchViewTest.post, token='приключен'
+        ).exists())
+
+
+class SearchCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        Post.objects.bulk_create(
+            Post(author=SearchCacheTest.author, text=f'Пост номер {i}')
+            for i in range(POST_LIMIT + 3)
+        )
+        for post in Post.objects.all():
+            index_post(post)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_same_stems_share_cached_ids(self):
+        """Запросы с одинаковыми основами читают один список id."""
+        ids = cached_search_ids('Посты номер')
+        self.assertEqual(len(ids), POST_LIMIT + 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_search_ids('НОМЕР поста'), ids)
+
+    def test_new_post_invalidates_cached_ids(self):
+        """Новый пост пишет в индекс и сбрасывает выдачу."""
+        cached_search_ids('пост')
+        Post.objects.create(author=SearchCacheTest.author, text='Ещё пост')
+        self.assertEqual(len(cached_search_ids('пост')), POST_LIMIT + 4)
+
+    def test_unrelated_changes_keep_cached_ids(self):
+        """Изменения вне поискового индекса выдачу не сбрасывают."""
+        ids = cached_search_ids('пост')
+        bump_content_version()
+        Follow.objects.create(
+            user=User.objects.create_user(username='Reader'),
+            author=SearchCacheTest.author,
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_search_ids('пост'), ids)
+
+    def test_page_hydrates_only_its_posts(self):
+        """Страница выдачи читает из базы только свои посты: сами посты,
+        превью комментариев и счётчики отметок."""
+        client = Client()
+        client.get(reverse('posts:index'), {'search': 'пост'})
+        with self.assertNumQueries(3):
+            response = client.get(
+                reverse('posts:index'), {'search': 'пост', 'page': 2}
+            )
+        self.assertEqual(len(response.context['page_obj']), 3)
@@ -0,0 +1,93 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..sitemaps import build_sitemaps, keyset
+
+User = get_user_model()
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITE_URL='https://yatube.example'
+)
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        Group.objects.create(title='Группа', slug='group')
+        for i in range(5):
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def read(self, name):
+        with gzip.open(os.path.join(TEMP_SITEMAP_ROOT, name), 'rt') as file:
+            return file.read()
+
+    def build(self, **options):
+        return build_sitemaps(
+            TEMP_SITEMAP_ROOT, settings.SITE_URL, **options
+        )
+
+    def test_keyset_reads_in_chunks(self):
+        with self.assertNumQueries(3):
+            rows = list(keyset(Post.objects.all(), ('pub_date',), chunk=2))
+        self.assertEqual(
+            [row['pk'] for row in rows],
+            sorted(Post.objects.values_list('pk', flat=True))
+        )
+
+    @mock.patch('posts.sitemaps.SITEMAP_SIZE', 2)
+    def test_incremental_update_rewrites_only_last_file(self):
+        manifest = self.build(full=True)
+        self.assertEqual(
+            [record['count'] for record in manifest['posts']], [2, 2, 1]
+        )
+        first = os.path.join(TEMP_SITEMAP_ROOT, 'posts-1.xml.gz')
+        written = os.stat(first).st_mtime_ns
+        post = Post.objects.create(author=SitemapTest.author, text='Новый')
+        manifest = self.build()
+        self.assertEqual(
+            [record['count'] for record in manifest['posts']], [2, 2, 2]
+        )
+        self.assertEqual(os.stat(first).st_mtime_ns, written)
+        url = reverse('posts:post_detail', args=[post.pk])
+        self.assertIn(
+            f'<loc>https://yatube.example{url}</loc>',
+            self.read('posts-3.xml.gz')
+        )
+
+    def test_command_and_serving(self):
+        out = StringIO()
+        call_command('build_sitemaps', '--full', stdout=out)
+        self.assertIn('posts: файлов 1, адресов 5', out.getvalue())
+        self.assertIn('/group/group/', self.read('groups-1.xml.gz'))
+        index = self.client.get(reverse('posts:sitemap'))
+        content = b''.join(index.streaming_content).decode()
+        section_url = reverse('posts:sitemap_section', args=['posts-1.xml.gz'])
+        self.assertIn(f'https://yatube.example{section_url}', content)
+        section = self.client.get(section_url)
+        self.assertEqual(section.status_code, 200)
+        self.assertEqual(section['Content-Encoding'], 'gzip')
+        missing = reverse('posts:sitemap_section', args=['posts-9.xml.gz'])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+        robots = self.client.get(reverse('posts:robots'))
+        self.assertContains(
+            robots, 'Sitemap: https://yatube.example/sitemap.xml'
+        )
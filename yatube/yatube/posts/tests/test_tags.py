@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import (Follow, Notification, NotificationState, Post,
+                      PostTag, Tag)
+from ..notifications import feed_unread_count, unread_count
+from ..tags import parse_mentions, parse_tags
+from ..templatetags.post_text import linkify
+
+User = get_user_model()
+
+
+class TagTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.reader = User.objects.create_user(username='reader.one')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_parsing(self):
+        text = 'Про #Лето и #лето, &#39; не тег; пишите @reader.one. a@b.c'
+        self.assertEqual(parse_tags(text), ['лето'])
+        self.assertEqual(parse_mentions(text), ['reader.one'])
+
+    def test_tags_follow_post_text(self):
+        post = Post.objects.create(author=TagTest.author, text='#один #два')
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'один', 'два'}
+        )
+        post.text = '#два #три'
+        post.save()
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'два', 'три'}
+        )
+        self.assertEqual(Tag.objects.count(), 3)
+        self.assertEqual(
+            PostTag.objects.get(post=post, tag__name='два').pub_date,
+            post.pub_date
+        )
+
+    def test_tag_feed(self):
+        posts = [
+            Post.objects.create(author=TagTest.author, text=f'#Тег {i}')
+            for i in range(3)
+        ]
+        Post.objects.create(author=TagTest.author, text='Без тега')
+        response = self.client.get(reverse('posts:tag', args=['ТЕГ']))
+        self.assertEqual(
+            list(response.context['page_obj']), posts[::-1]
+        )
+        tag_url = reverse('posts:tag', args=['тег'])
+        self.assertContains(response, f'href="{tag_url}"')
+        missing = self.client.get(reverse('posts:tag', args=['нет']))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_mentions_notify_and_can_be_disabled(self):
+        post = Post.objects.create(
+            author=TagTest.author, text='Привет, @reader.one и @Auth'
+        )
+        notification = Notification.objects.get(user=TagTest.reader)
+        self.assertEqual(
+            (notification.post, notification.kind),
+            (post, Notification.MENTION)
+        )
+        self.assertEqual(unread_count(TagTest.reader), 1)
+        self.assertEqual(feed_unread_count(TagTest.reader), 0)
+        NotificationState.objects.filter(user=TagTest.reader).update(
+            mentions=False
+        )
+        Post.objects.create(author=TagTest.author, text='Снова @reader.one')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_mentioned_follower_gets_both_notifications(self):
+        """Упоминание подписчика не вытесняет уведомление о посте."""
+        Follow.objects.create(user=TagTest.reader, author=TagTest.author)
+        post = Post.objects.create(
+            author=TagTest.author, text='Привет, @reader.one'
+        )
+        self.assertEqual(
+            set(Notification.objects.filter(
+                user=TagTest.reader, post=post
+            ).values_list('kind', flat=True)),
+            {Notification.POST, Notification.MENTION}
+        )
+        self.assertEqual(unread_count(TagTest.reader), 2)
+        self.assertEqual(feed_unread_count(TagTest.reader), 1)
+
+    def test_mentions_toggle(self):
+        client = Client()
+        client.force_login(TagTest.reader)
+        client.post(reverse('posts:notifications_mentions'))
+        self.assertFalse(
+            NotificationState.objects.get(user=TagTest.reader).mentions
+        )
+
+    def test_linkify_escapes_text(self):
+        html = linkify('<b>#тег</b> @Auth')
+        self.assertEqual(
+            html,
+            '&lt;b&gt;<a href="/tag/%D1%82%D0%B5%D0%B3/">#тег</a>&lt;/b&gt; '
+            '<a href="/profile/Auth/">@Auth</a>'
+        )
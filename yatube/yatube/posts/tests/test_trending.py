@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Post, PostScore, TrendingState
+from ..trending import (COMMENT_WEIGHT, DECAY_INTERVAL, FOLLOW_WEIGHT,
+                        HALF_LIFE, decay, trending_posts)
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.quiet = Post.objects.create(author=cls.author, text='Тихий')
+        cls.busy = Post.objects.create(author=cls.author, text='Обсуждаемый')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(
+                post=post, author=TrendingTest.reader, text='Комментарий'
+            )
+
+    def test_comments_and_follows_raise_score(self):
+        """Комментарий прибавляет вес посту, подписка — последнему
+        посту автора."""
+        self.comment(TrendingTest.quiet, 2)
+        Follow.objects.create(
+            user=TrendingTest.reader, author=TrendingTest.author
+        )
+        self.assertEqual(
+            PostScore.objects.get(post=TrendingTest.quiet).score,
+            2 * COMMENT_WEIGHT
+        )
+        self.assertEqual(
+            PostScore.objects.get(post=TrendingTest.busy).score,
+            FOLLOW_WEIGHT
+        )
+
+    def test_top_is_one_query_ordered_by_score(self):
+        self.comment(TrendingTest.quiet)
+        self.comment(TrendingTest.busy, 3)
+        with self.assertNumQueries(1):
+            posts = list(trending_posts())
+        self.assertEqual(posts, [TrendingTest.busy, TrendingTest.quiet])
+
+    def test_decay_halves_score_and_drops_faded(self):
+        self.comment(TrendingTest.busy, 4)
+        self.comment(TrendingTest.quiet)
+        start = timezone.now()
+        TrendingState.objects.create(pk=1, decayed_at=start)
+        factor, removed = decay(
+            now=start + timedelta(seconds=HALF_LIFE * 5)
+        )
+        self.assertAlmostEqual(factor, 0.5 ** 5)
+        self.assertEqual(removed, 1)
+        self.assertFalse(
+            PostScore.objects.filter(post=TrendingTest.quiet).exists()
+        )
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=TrendingTest.busy).score,
+            4 * COMMENT_WEIGHT * 0.5 ** 5
+        )
+        decay(now=start + timedelta(seconds=HALF_LIFE * 10))
+        self.assertFalse(PostScore.objects.exists())
+
+    def test_decay_time_survives_between_runs(self):
+        """Каждый запуск затухает на время с прошлого, а не на
+        DECAY_INTERVAL: отметка хранится в базе."""
+        start = timezone.now()
+        self.assertAlmostEqual(
+            decay(now=start)[0], 0.5 ** (DECAY_INTERVAL / HALF_LIFE)
+        )
+        cache.clear()
+        factor, _ = decay(now=start + timedelta(seconds=HALF_LIFE))
+        self.assertAlmostEqual(factor, 0.5)
+        self.assertEqual(TrendingState.objects.get().decayed_at,
+                         start + timedelta(seconds=HALF_LIFE))
+
+    def test_popular_page_and_command(self):
+        self.comment(TrendingTest.busy)
+        response = Client().get(reverse('posts:popular'))
+        self.assertEqual(
+            list(response.context['page_obj']), [TrendingTest.busy]
+        )
+        self.assertContains(response, 'Популярное')
+        out = StringIO()
+        call_command('decay_trending', stdout=out)
+        self.assertIn('Множитель затухания', out.getvalue())
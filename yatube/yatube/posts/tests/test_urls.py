@@ -45,6 +45,7 @@ class PostsURLTests(TestCase):
         '/unexisting_page/'."""
         urls = [
             '/',
+            '/popular/',
             f'/group/{PostsURLTests.group.slug}/',
             f'/profile/{PostsURLTests.author.username}/',
             f'/posts/{PostsURLTests.post.pk}/',
@@ -10,7 +10,8 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..forms import PostForm
-from ..models import Follow, Group, Post
+from ..models import Comment, Follow, Group, Post
+from ..utils import COMMENT_PREVIEW_LIMIT
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 User = get_user_model()
@@ -103,6 +104,26 @@ class PostPagesTests(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(value, expected)
 
+    def test_feeds_do_not_load_post_text(self):
+        """Ленты читают анонс вместо полного текста поста."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list',
+                    kwargs={'slug': PostPagesTests.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': PostPagesTests.author.username}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.guest_client.get(url)
+                first_object = response.context['page_obj'][0]
+                self.assertIn('text', first_object.get_deferred_fields())
+                self.assertEqual(
+                    first_object.excerpt,
+                    PostPagesTests.post.excerpt
+                )
+
     def test_index_page_cache(self):
         """Список постов на главной странице сайта хранится в кэше."""
         post_cache = Post.objects.create(
@@ -308,3 +329,152 @@ class PaginatorViewsTest(TestCase):
         ]
         for response in responses_paginator:
             self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class GroupIndexViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.empty_group = Group.objects.create(
+            title='Пустая группа',
+            slug='empty-slug',
+            description='Тестовое описание',
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=GroupIndexViewTest.author,
+            group=GroupIndexViewTest.group,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_group_index_show_correct_context(self):
+        """Каталог групп упорядочен по последней публикации."""
+        response = self.guest_client.get(reverse('posts:group_index'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(
+            groups,
+            [GroupIndexViewTest.group, GroupIndexViewTest.empty_group]
+        )
+        self.assertEqual(groups[0].posts_count, 1)
+
+    def test_group_cache_invalidated_on_save(self):
+        """Изменение группы сбрасывает её закэшированную копию."""
+        group = GroupIndexViewTest.group
+        url = reverse('posts:group_list', kwargs={'slug': group.slug})
+        self.guest_client.get(url)
+        group.title = 'Новое название'
+        group.save()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['group'].title, 'Новое название')
+
+
+class CommentPreviewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.post = Post.objects.create(
+            author=CommentPreviewTest.author,
+            text='Тестовый пост',
+        )
+        cls.quiet_post = Post.objects.create(
+            author=CommentPreviewTest.author,
+            text='Пост без комментариев',
+        )
+        for i in range(COMMENT_PREVIEW_LIMIT + 2):
+            Comment.objects.create(
+                post=CommentPreviewTest.post,
+                author=CommentPreviewTest.author,
+                text=f'Комментарий {i}',
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_feed_shows_bounded_comment_preview(self):
+        """Лента показывает не больше COMMENT_PREVIEW_LIMIT последних
+        комментариев и общее их число."""
+        response = self.guest_client.get(reverse('posts:index'))
+        posts = {post.pk: post for post in response.context['page_obj']}
+        post = posts[CommentPreviewTest.post.pk]
+        self.assertEqual(post.comments_count, COMMENT_PREVIEW_LIMIT + 2)
+        self.assertEqual(
+            [comment.text for comment in post.comment_preview],
+            [
+                f'Комментарий {i}'
+                for i in range(2, COMMENT_PREVIEW_LIMIT + 2)
+            ]
+        )
+        quiet_post = posts[CommentPreviewTest.quiet_post.pk]
+        self.assertEqual(quiet_post.comments_count, 0)
+        self.assertContains(
+            response, f'Показать все ({COMMENT_PREVIEW_LIMIT + 2})'
+        )
+
+
+class PageFragmentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Auth')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(
+            author=PageFragmentsTest.author,
+            text='Тестовый пост',
+        )
+        Follow.objects.create(
+            user=PageFragmentsTest.reader,
+            author=PageFragmentsTest.author,
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(PageFragmentsTest.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(PageFragmentsTest.reader)
+        cache.clear()
+
+    def test_cached_post_page_has_personal_fragments(self):
+        """Страница поста берётся из кэша, а кнопки правки и форма
+        комментария отрисовываются для каждого пользователя."""
+        url = reverse('posts:post_detail', args=(PageFragmentsTest.post.pk,))
+        edit_url = reverse(
+            'posts:post_edit', args=(PageFragmentsTest.post.pk,)
+        )
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, edit_url)
+        self.assertNotContains(response, 'Добавить комментарий')
+        response = self.author_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, edit_url)
+        self.assertContains(response, 'Пользователь: Auth')
+        response = self.reader_client.get(url)
+        self.assertNotContains(response, edit_url)
+        self.assertContains(response, 'Добавить комментарий')
+
+    def test_cached_profile_has_personal_follow_button(self):
+        """Кнопка подписки на закэшированном профиле своя у каждого."""
+        url = reverse(
+            'posts:profile',
+            kwargs={'username': PageFragmentsTest.author.username}
+        )
+        self.assertContains(self.guest_client.get(url), 'Подписаться')
+        response = self.reader_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Отписаться')
+        response = self.author_client.get(url)
+        self.assertNotContains(response, 'Подписаться')
@@ -0,0 +1,99 @@
+"""Рейтинг популярных постов.
+
+Каждый новый комментарий или подписка прибавляет вес к строке
+PostScore одним UPDATE, а просмотры приходят пачкой при сбросе
+буфера posts.counters, поэтому на запрос не приходится GROUP BY
+по всем комментариям. Команда decay_trending по расписанию умножает
+все рейтинги на общий множитель затухания за время с прошлого
+запуска (оно хранится в TrendingState) и удаляет угасшие строки,
+а лента популярного читает верх таблицы по индексу score.
+"""
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from .models import Post, PostScore, TrendingState
+
+COMMENT_WEIGHT: float = 1.0
+FOLLOW_WEIGHT: float = 3.0
+VIEW_WEIGHT: float = 0.1
+HALF_LIFE: int = 6 * 60 * 60
+DECAY_INTERVAL: int = 60 * 60
+MIN_SCORE: float = 0.05
+TRENDING_SIZE: int = 50
+
+
+def add_score(post_id, weight):
+    """Прибавляет вес к рейтингу поста, заводя строку при первом
+    событии."""
+    bump = {'score': F('score') + weight, 'updated': timezone.now()}
+    if PostScore.objects.filter(post_id=post_id).update(**bump):
+        return
+    _, created = PostScore.objects.get_or_create(
+        post_id=post_id, defaults={'score': weight}
+    )
+    if not created:
+        PostScore.objects.filter(post_id=post_id).update(**bump)
+
+
+def add_scores(weights):
+    """Прибавляет веса {post_id: вес} к нескольким постам одним
+    UPDATE."""
+    if not weights:
+        return
+    existing = set(PostScore.objects.filter(
+        post_id__in=weights
+    ).values_list('post_id', flat=True))
+    PostScore.objects.bulk_create(
+        [PostScore(post_id=post_id) for post_id in weights
+         if post_id not in existing],
+        ignore_conflicts=True,
+    )
+    PostScore.objects.filter(post_id__in=weights).update(
+        score=Case(
+            *(When(post_id=post_id, then=F('score') + weight)
+              for post_id, weight in weights.items()),
+            default=F('score'),
+        ),
+        updated=timezone.now(),
+    )
+
+
+def score_follow(author_id):
+    """Подписка поднимает последний пост автора: чаще всего на автора
+    подписываются, прочитав его свежую запись."""
+    post_id = Post.objects.filter(author_id=author_id).values_list(
+        'pk', flat=True
+    ).first()
+    if post_id is not None:
+        add_score(post_id, FOLLOW_WEIGHT)
+
+
+def decay(now=None):
+    """Затухание с прошлого запуска и удаление угасших рейтингов.
+
+    Первый запуск затухает на DECAY_INTERVAL. Возвращает применённый
+    множитель и число удалённых строк.
+    """
+    now = timezone.now() if now is None else now
+    with transaction.atomic():
+        state, _ = TrendingState.objects.select_for_update().get_or_create(
+            pk=1
+        )
+        if state.decayed_at is None:
+            elapsed = DECAY_INTERVAL
+        else:
+            elapsed = (now - state.decayed_at).total_seconds()
+        factor = 0.5 ** (max(elapsed, 0) / HALF_LIFE)
+        PostScore.objects.update(score=F('score') * factor)
+        removed, _ = PostScore.objects.filter(score__lt=MIN_SCORE).delete()
+        state.decayed_at = now
+        state.save(update_fields=['decayed_at'])
+    return factor, removed
+
+
+def trending_posts(limit=TRENDING_SIZE):
+    """Верх рейтинга одним запросом по индексу score."""
+    return Post.objects.filter(score__score__gt=0).order_by(
+        '-score__score', '-pub_date'
+    ).for_feed()[:limit]
@@ -1,14 +1,36 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from . import views
+from . import feeds, views
 from .views import PostDeleteView
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('feed/<str:kind>/', feeds.site_feed, name='feed'),
+    path('robots.txt', views.robots, name='robots'),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    re_path(
+        r'^sitemaps/(?P<name>[a-z]+-\d+\.xml\.gz)$',
+        views.sitemap,
+        name='sitemap_section'
+    ),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/feed/<str:kind>/',
+        feeds.group_feed,
+        name='group_feed'
+    ),
+    path('tag/<str:name>/', views.tag_posts, name='tag'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/<str:kind>/',
+        feeds.author_feed,
+        name='profile_feed'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.create_post, name='create_post'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -17,7 +39,20 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path('posts/<int:post_id>/like/', views.like, name='like'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/unread/', views.follow_unread, name='follow_unread'),
+    path('notifications/', views.notifications, name='notifications'),
+    path(
+        'notifications/digest/',
+        views.notifications_digest,
+        name='notifications_digest'
+    ),
+    path(
+        'notifications/mentions/',
+        views.notifications_mentions,
+        name='notifications_mentions'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
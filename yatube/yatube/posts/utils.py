@@ -1,6 +1,26 @@
 from django.core.paginator import Paginator
 
+from .models import Comment, User
+
 POST_LIMIT: int = 10
+COMMENT_PREVIEW_LIMIT: int = 3
+
+COMMENT_PREVIEW_SQL = '''
+    SELECT * FROM (
+        SELECT comment.*,
+               author.username AS author_username,
+               ROW_NUMBER() OVER (
+                   PARTITION BY comment.post_id
+                   ORDER BY comment.created DESC, comment.id DESC
+               ) AS position,
+               COUNT(*) OVER (PARTITION BY comment.post_id) AS total
+        FROM {comments} AS comment
+        JOIN {users} AS author ON author.id = comment.author_id
+        WHERE comment.post_id IN ({placeholders})
+    ) AS preview
+    WHERE position <= %s
+    ORDER BY post_id, position DESC
+'''
 
 
 def paginator(post_list, request):
@@ -8,3 +28,30 @@ def paginator(post_list, request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def attach_comment_previews(page_obj, limit=COMMENT_PREVIEW_LIMIT):
+    """Добавляет постам страницы последние комментарии и их общее
+    число (post.comment_preview, post.comments_count).
+
+    Все превью читаются одним оконным запросом, поэтому цена
+    страницы не зависит от того, сколько комментариев у постов.
+    """
+    posts = list(page_obj.object_list)
+    page_obj.object_list = posts
+    for post in posts:
+        post.comment_preview = []
+        post.comments_count = 0
+    if not posts:
+        return page_obj
+    by_id = {post.pk: post for post in posts}
+    sql = COMMENT_PREVIEW_SQL.format(
+        comments=Comment._meta.db_table,
+        users=User._meta.db_table,
+        placeholders=', '.join(['%s'] * len(by_id)),
+    )
+    for comment in Comment.objects.raw(sql, [*by_id, limit]):
+        post = by_id[comment.post_id]
+        post.comment_preview.append(comment)
+        post.comments_count = comment.total
+    return page_obj
@@ -1,81 +1,151 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.db.models import F
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
-# from django.views.decorators.cache import cache_page
+from django.urls import reverse, reverse_lazy
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 from django.views.generic.edit import DeleteView
+from django.views.static import serve
 
+from core.cache import page_cache
+from core.querycache import use_query_cache
+from core.ratelimit import ratelimit
+
+from .autocomplete import GROUP, suggest
+from .cache import (content_version, get_group_or_404, group_cache,
+                    post_cache, user_cache)
+from .counters import counts_views
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
-from .utils import paginator
+from .likes import set_like
+from .models import Follow, Group, NotificationState, Post, PostViews, Tag
+from .notifications import feed_unread_count, mark_all_read, mark_feed_seen
+from .search import cached_search_ids, hydrate_posts, log_query
+from .sitemaps import INDEX
+from .trending import trending_posts
+from .utils import attach_comment_previews, paginator
 
 
-# @cache_page(20, key_prefix='index_page')
+@page_cache(key_prefix='index_page', version=content_version)
+@use_query_cache
 def index(request):
     search_query = request.GET.get('search', '')
     if search_query:
-        post_list = Post.objects.filter(
-            Q(text__icontains=search_query)
-            | Q(group__title__icontains=search_query)
-            | Q(author__username__icontains=search_query)
-            | Q(author__last_name__icontains=search_query)
-            | Q(author__first_name__icontains=search_query)
-            | Q(comments__author__username__icontains=search_query)
-            | Q(comments__text__icontains=search_query)
-        )
+        log_query(search_query)
+        page_obj = paginator(cached_search_ids(search_query), request)
+        page_obj.object_list = hydrate_posts(page_obj.object_list)
     else:
-        post_list = Post.objects.select_related('group')
-    page_obj = paginator(post_list, request)
-    comments = Comment.objects.select_related('post')
-    context = {'page_obj': page_obj, 'comments': comments, }
+        page_obj = paginator(Post.objects.for_feed(), request)
+    attach_comment_previews(page_obj)
+    context = {'page_obj': page_obj}
     return render(request, 'posts/index.html', context)
 
 
+@page_cache(key_prefix='popular', version=content_version)
+@use_query_cache
+def popular(request):
+    """Популярные посты: по рейтингу комментариев и подписок."""
+    page_obj = paginator(list(trending_posts()), request)
+    attach_comment_previews(page_obj)
+    context = {'page_obj': page_obj}
+    return render(request, 'posts/popular.html', context)
+
+
+def autocomplete(request):
+    """Подсказки для строки поиска: пользователи и группы."""
+    results = []
+    for kind, value, label in suggest(request.GET.get('q', '')):
+        if kind == GROUP:
+            url = reverse('posts:group_list', kwargs={'slug': value})
+            text = f'{label} (группа {value})'
+        else:
+            url = reverse('posts:profile', kwargs={'username': value})
+            text = f'{label} (@{value})'
+        results.append({
+            'id': f'{kind}:{value}',
+            'kind': kind,
+            'label': label,
+            'text': text,
+            'url': url,
+        })
+    return JsonResponse({'results': results})
+
+
+def group_index(request):
+    """Каталог групп: число постов и дата последней публикации."""
+    group_list = Group.objects.order_by(
+        F('last_post_date').desc(nulls_last=True),
+        'title'
+    )
+    page_obj = paginator(group_list, request)
+    context = {'page_obj': page_obj}
+    return render(request, 'posts/group_index.html', context)
+
+
+@page_cache(key_prefix='group_posts', version=content_version)
+@use_query_cache
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related()
-    page_obj = paginator(post_list, request)
-    comments = Comment.objects.select_related('post')
+    group = get_group_or_404(slug)
+    post_list = group.posts.for_feed()
+    page_obj = attach_comment_previews(paginator(post_list, request))
     context = {
         'group': group,
         'page_obj': page_obj,
-        'comments': comments,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@page_cache(key_prefix='profile', version=content_version)
+@use_query_cache
 def profile(request, username):
-    user = request.user
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = paginator(post_list, request)
-    following = user.is_authenticated and author.following.exists()
-    comments = Comment.objects.select_related('post')
+    author = user_cache.get_or_404(username=username)
+    post_list = author.posts.for_feed()
+    page_obj = attach_comment_previews(paginator(post_list, request))
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following,
-        'comments': comments,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@page_cache(key_prefix='tag_posts', version=content_version)
+@use_query_cache
+def tag_posts(request, name):
+    """Лента тега: чтение индекса (tag, -pub_date) таблицы PostTag."""
+    tag = get_object_or_404(Tag, name=name.lower())
+    post_list = Post.objects.filter(post_tags__tag=tag).order_by(
+        '-post_tags__pub_date'
+    ).for_feed()
+    page_obj = attach_comment_previews(paginator(post_list, request))
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
+@counts_views
+@page_cache(key_prefix='post_detail', version=content_version)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    author = post.author
-    form = CommentForm(request.POST or None)
+    post = post_cache.get_or_404(post_id)
+    post.author = author = user_cache.get(post.author_id)
+    if post.group_id is not None:
+        post.group = group_cache.get(post.group_id)
     comments = post.comments
+    view_stats = PostViews.objects.filter(post_id=post.pk).first()
     context = {
         'post': post,
         'author': author,
-        'form': form,
         'comments': comments,
+        'view_stats': view_stats,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@ratelimit('10/m')
 def create_post(request):
     template = 'posts/create_post.html'
     if request.method == 'POST':
@@ -92,7 +162,7 @@ def create_post(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = post_cache.get_or_404(post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(
@@ -108,36 +178,103 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('20/m')
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = Post.objects.get(id=post_id)
+        comment.post = post_cache.get_or_404(post_id)
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@require_POST
+@login_required
+@ratelimit('60/m')
+def like(request, post_id):
+    """Ставит (liked=1) или снимает (liked=0) отметку «нравится»:
+    повтор того же запроса ничего не меняет."""
+    post = post_cache.get_or_404(post_id)
+    set_like(request.user, post.pk, request.POST.get('liked') == '1')
+    next_url = request.POST.get('next')
+    if not is_safe_url(next_url, allowed_hosts={request.get_host()}):
+        return redirect('posts:post_detail', post_id=post.pk)
+    return redirect(next_url)
+
+
 @login_required
 def follow_index(request):
     """Страница подписок текущего пользователя"""
     user = request.user
     authors = user.follower.values_list('author', flat=True)
-    post_list = Post.objects.filter(author__id__in=authors)
-    page_obj = paginator(post_list, request)
-    comments = Comment.objects.select_related('post')
+    post_list = Post.objects.filter(author__id__in=authors).for_feed()
+    page_obj = attach_comment_previews(paginator(post_list, request))
+    mark_feed_seen(user)
     context = {
         'page_obj': page_obj,
         'user': user,
-        'comments': comments,
     }
     return render(request, 'posts/follow_index.html', context)
 
 
 @login_required
+def follow_unread(request):
+    """Число новых постов в ленте подписок для опроса из браузера.
+
+    Читается из кэша без обращения к постам; на HEAD-запрос хватает
+    заголовка X-Unread-Count.
+    """
+    unread = feed_unread_count(request.user)
+    response = JsonResponse({'unread': unread})
+    response['X-Unread-Count'] = unread
+    return response
+
+
+@login_required
+def notifications(request):
+    """Уведомления о новых постах; открытие страницы их прочитывает."""
+    user = request.user
+    notification_list = user.notifications.select_related(
+        'post__author'
+    ).order_by('-created')
+    page_obj = paginator(notification_list, request)
+    page_obj.object_list = list(page_obj.object_list)
+    mark_all_read(user)
+    state = NotificationState.objects.filter(user=user).first()
+    context = {
+        'page_obj': page_obj,
+        'digest': state is not None and state.digest,
+        'mentions': state is None or state.mentions,
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+@login_required
+def notifications_digest(request):
+    """Включает или выключает ежедневную сводку на почту."""
+    if request.method == 'POST':
+        state, _ = NotificationState.objects.get_or_create(user=request.user)
+        state.digest = not state.digest
+        state.save(update_fields=['digest'])
+    return redirect('posts:notifications')
+
+
+@login_required
+def notifications_mentions(request):
+    """Включает или выключает уведомления об упоминаниях."""
+    if request.method == 'POST':
+        state, _ = NotificationState.objects.get_or_create(user=request.user)
+        state.mentions = not state.mentions
+        state.save(update_fields=['mentions'])
+    return redirect('posts:notifications')
+
+
+@login_required
+@ratelimit('30/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
     """Функция подписки на автора."""
-    author = User.objects.get(username=username)
+    author = user_cache.get_or_404(username=username)
     user = request.user
     if user.id != author.id and user not in author.following.values_list(
         'user',
@@ -150,7 +287,7 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     """Функция отмены подписки на автора."""
-    author = User.objects.get(username=username)
+    author = user_cache.get_or_404(username=username)
     user = request.user
     if Follow.objects.filter(user=user, author=author).exists():
         follow_relationship = Follow.objects.get(author=author, user=user)
@@ -162,3 +299,14 @@ class PostDeleteView(LoginRequiredMixin, DeleteView):
     model = Post
     template_name = 'posts/post_delete.html'
     success_url = reverse_lazy('posts:index')
+
+
+def sitemap(request, name=INDEX):
+    """Готовые карты сайта из SITEMAP_ROOT: строит их build_sitemaps,
+    а в бою отдаёт веб-сервер."""
+    return serve(request, name, document_root=settings.SITEMAP_ROOT)
+
+
+def robots(request):
+    context = {'site_url': settings.SITE_URL.rstrip('/')}
+    return render(request, 'robots.txt', context, content_type='text/plain')
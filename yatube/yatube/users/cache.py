@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from core.objectcache import OBJECT_CACHE_TIMEOUT, ModelCache
+
+User = get_user_model()
+
+# Хэш пароля в кэш не попадает: его читают из базы только там,
+# где он нужен.
+user_cache = ModelCache(User, lookups=['username'], exclude=['password'])
+
+
+def auth_key(user_id):
+    return f'user:auth:{user_id}'
+
+
+def auth_state(user_id):
+    """Хэш для проверки сессий и is_active пользователя или None.
+
+    В кэше лежит HMAC хэша пароля на SECRET_KEY (то, что Django
+    кладёт в сессию), а не сам хэш пароля; сохранение пользователя
+    сбрасывает запись.
+    """
+    key = auth_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values_list(
+            'password', 'is_active'
+        ).first()
+        if row is None:
+            return None
+        password, is_active = row
+        user = User(pk=user_id, password=password)
+        state = (user.get_session_auth_hash(), is_active)
+        cache.set(key, state, OBJECT_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_users(*pks):
+    """Сбрасывает кэш пользователей, изменённых мимо save(), например
+    через QuerySet.update()."""
+    user_cache.invalidate(*pks)
+    cache.delete_many([auth_key(pk) for pk in pks])
+
+
+def drop_auth_state(sender, instance, **kwargs):
+    cache.delete(auth_key(instance.pk))
+
+
+post_save.connect(drop_auth_state, sender=User)
+post_delete.connect(drop_auth_state, sender=User)
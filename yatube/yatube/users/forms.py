@@ -1,5 +1,9 @@
+from time import time
+
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from .tasks import send_password_reset
 
 User = get_user_model()
 
@@ -8,3 +12,29 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо рендерит и отправляет воркер.
+
+    В очередь попадают только id пользователя, имена шаблонов и адрес
+    сайта; ссылку с токеном задача создаёт сама перед отправкой, так
+    что в таблице задач токенов нет.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        user_id = context['user'].pk
+        send_password_reset.enqueue(
+            key=f'password-reset:{user_id}:{int(time() // 60)}',
+            user_id=user_id,
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            html_email_template_name=html_email_template_name,
+            from_email=from_email,
+            to_email=to_email,
+            domain=context['domain'],
+            site_name=context['site_name'],
+            protocol=context['protocol'],
+        )
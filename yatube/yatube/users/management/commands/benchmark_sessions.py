@@ -0,0 +1,61 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+DEFAULT_MIDDLEWARE = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+CACHED_MIDDLEWARE = 'users.middleware.CachedAuthenticationMiddleware'
+VARIANTS = (
+    ('db', DEFAULT_MIDDLEWARE),
+    ('db', CACHED_MIDDLEWARE),
+    ('cached_db', CACHED_MIDDLEWARE),
+    ('signed_cookies', CACHED_MIDDLEWARE),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет запросы в секунду для вошедшего пользователя при разных '
+        'хранилищах сессий. Тестовый пользователь удаляется после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--url', default=reverse('posts:follow_index'))
+
+    def browse(self, user, url, count):
+        client = Client()
+        client.force_login(user)
+        client.get(url)
+        start = perf_counter()
+        for _ in range(count):
+            client.get(url)
+        return count / (perf_counter() - start)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark_sessions')
+            for backend, middleware in VARIANTS:
+                stack = [
+                    middleware
+                    if name in (DEFAULT_MIDDLEWARE, CACHED_MIDDLEWARE)
+                    else name
+                    for name in settings.MIDDLEWARE
+                ]
+                with override_settings(
+                    SESSION_ENGINE=f'django.contrib.sessions.backends.'
+                                   f'{backend}',
+                    MIDDLEWARE=stack,
+                ):
+                    rps = self.browse(
+                        user, options['url'], options['requests']
+                    )
+                name = middleware.rsplit('.', 1)[-1]
+                self.stdout.write(f'{backend} + {name}: {rps:.0f} запросов/с')
+            transaction.set_rollback(True)
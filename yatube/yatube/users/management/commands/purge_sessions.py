@@ -0,0 +1,35 @@
+from time import sleep
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет просроченные сессии из базы небольшими пачками, чтобы '
+        'не держать блокировку записи SQLite. Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(
+                expired.values_list('pk', flat=True)[:options['batch']]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                Session.objects.filter(pk__in=keys).delete()
+            deleted += len(keys)
+            sleep(options['pause'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
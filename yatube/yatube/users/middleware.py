@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .cache import User, auth_state, user_cache
+
+
+def get_user(request):
+    """То же, что django.contrib.auth.get_user, но пользователь и хэш
+    для проверки сессии читаются из общего кэша, а не из базы на
+    каждый запрос.
+
+    Сохранение пользователя сбрасывает обе записи во всех процессах,
+    поэтому смена пароля или блокировка разлогинивает остальные
+    сессии. Изменения мимо save() должны вызывать invalidate_users.
+    """
+    try:
+        user_id = User._meta.pk.to_python(
+            request.session[auth.SESSION_KEY]
+        )
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    backend = auth.load_backend(backend_path)
+    state = auth_state(user_id)
+    if state is None:
+        return AnonymousUser()
+    try:
+        user = user_cache.get(user_id)
+    except User.DoesNotExist:
+        return AnonymousUser()
+    expected_hash, user.is_active = state
+    can_authenticate = getattr(backend, 'user_can_authenticate', None)
+    if can_authenticate is not None and not can_authenticate(user):
+        return AnonymousUser()
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+            session_hash, expected_hash)):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
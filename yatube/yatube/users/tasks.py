@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.registry import task
+
+User = get_user_model()
+
+
+@task(priority=10)
+def send_email(subject, body, from_email, to, html=None):
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
+
+
+@task(priority=10)
+def send_password_reset(user_id, subject_template_name, email_template_name,
+                        from_email, to_email, domain, site_name, protocol,
+                        html_email_template_name=None):
+    """Письмо со ссылкой сброса пароля; токен создаётся здесь,
+    а не в запросе."""
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return
+    context = {
+        'email': to_email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    subject = ''.join(
+        loader.render_to_string(subject_template_name, context).splitlines()
+    )
+    html = None
+    if html_email_template_name is not None:
+        html = loader.render_to_string(html_email_template_name, context)
+    send_email(
+        subject=subject,
+        body=loader.render_to_string(email_template_name, context),
+        from_email=from_email,
+        to=[to_email],
+        html=html,
+    )
@@ -1,3 +1,82 @@
-# from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import invalidate_users
+
+User = get_user_model()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class CachedAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Reader')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_user_is_read_from_cache(self):
+        """Повторный запрос читает из базы только сессию."""
+        url = reverse('about:author')
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'Пользователь: Reader')
+
+    def test_password_change_ends_other_sessions(self):
+        """Смена пароля сбрасывает кэш и разлогинивает сессию."""
+        url = reverse('about:author')
+        self.client.get(url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Пользователь: Reader')
+
+    def test_update_with_invalidation_ends_sessions(self):
+        """Блокировка и смена пароля через update() вместе
+        с invalidate_users разлогинивают сессию."""
+        url = reverse('about:author')
+        self.client.get(url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidate_users(self.user.pk)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Пользователь: Reader')
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        invalidate_users(self.user.pk)
+        self.client.force_login(self.user)
+        self.client.get(url)
+        User.objects.filter(pk=self.user.pk).update(password='changed')
+        invalidate_users(self.user.pk)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Пользователь: Reader')
+
+
+class PurgeSessionsTest(TestCase):
+    def test_only_expired_sessions_are_deleted(self):
+        """Команда удаляет пачками только просроченные сессии."""
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                session_key=f'expired{i}',
+                session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key='alive',
+            session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        out = StringIO()
+        call_command('purge_sessions', '--batch', '2', '--pause', '0',
+                     stdout=out)
+        self.assertIn('Удалено сессий: 5', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('pk', flat=True)), ['alive']
+        )
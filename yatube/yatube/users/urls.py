@@ -7,7 +7,10 @@ from django.contrib.auth.views import (LoginView, LogoutView,
                                        PasswordResetView)
 from django.urls import path, reverse_lazy
 
+from core.ratelimit import ratelimit
+
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -24,7 +27,9 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        ratelimit('10/m', key='ip', scope='login')(
+            LoginView.as_view(template_name='users/login.html')
+        ),
         name='login'
     ),
     path(
@@ -45,6 +50,7 @@ urlpatterns = [
     path(
         'password_reset/',
         PasswordResetView.as_view(
+            form_class=QueuedPasswordResetForm,
             template_name='users/password_reset_form.html',
             success_url=reverse_lazy('users:password_reset_done')
         ),
@@ -1,12 +1,16 @@
 # Импортируем CreateView, чтобы создать ему наследника
 # Функция reverse_lazy позволяет получить URL по параметрам функции path()
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 
+from core.ratelimit import ratelimit
+
 # Импортируем класс формы, чтобы сослаться на неё во view-классе
 from .forms import CreationForm
 
 
+@method_decorator(ratelimit('5/h', key='ip', scope='signup'), name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     # куда перенаправить пользователя после успешной отправки формы
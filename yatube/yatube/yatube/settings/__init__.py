@@ -0,0 +1,28 @@
+"""
+Django settings for yatube project.
+
+The profile is selected by the YATUBE_ENV environment variable:
+dev (default), test or prod. Every profile extends settings.base.
+"""
+
+import os
+from importlib import import_module
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENVIRONMENT = os.getenv('YATUBE_ENV', 'dev')
+ENVIRONMENTS = ('dev', 'test', 'prod')
+
+if ENVIRONMENT not in ENVIRONMENTS:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV должна быть одной из {ENVIRONMENTS}, '
+        f'получено {ENVIRONMENT!r}'
+    )
+
+_profile = import_module(f'{__name__}.{ENVIRONMENT}')
+globals().update(
+    (name, value) for name, value in vars(_profile).items() if name.isupper()
+)
+
+if ENVIRONMENT == 'prod' and DEBUG:  # noqa: F821
+    raise ImproperlyConfigured('DEBUG нельзя включать в production.')
@@ -1,5 +1,8 @@
 """
-Django settings for yatube project.
+Common Django settings for yatube project.
+
+Environment profiles (dev, test, prod) extend this module,
+see yatube/settings/__init__.py.
 
 Generated by 'django-admin startproject' using Django 2.2.19.
 
@@ -13,17 +16,22 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
 
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'biiy286&#ts9&me4#m0)fty^w$*s%6-9zwib6ewsb!f2zj58)m'
+SECRET_KEY = os.getenv(
+    'SECRET_KEY',
+    'biiy286&#ts9&me4#m0)fty^w$*s%6-9zwib6ewsb!f2zj58)m'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', '').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -42,6 +50,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,7 +58,6 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
@@ -57,17 +65,37 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.fragments.FragmentMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
-INTERNAL_IPS = [
-    '127.0.0.1',
-]
+# db, cached_db или signed_cookies: при cached_db сессия читается
+# из кэша, а таблица django_session получает только записи.
+# Просроченные сессии из базы удаляет команда purge_sessions.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv(
+    'SESSION_BACKEND', 'db'
+)
+
+# Фоновые задачи выполняет manage.py runworker (см. jobs.worker);
+# при JOBS_EAGER они выполняются сразу в процессе запроса.
+JOBS_EAGER = False
+
+# Счётчики ограничения частоты запросов (см. core.ratelimit).
+RATELIMIT_ENABLED = True
+RATELIMIT_STORE = 'core.ratelimit.CacheStore'
+# Заголовок с адресом клиента от доверенного обратного прокси
+# (например 'HTTP_X_FORWARDED_FOR') и число прокси перед приложением.
+# Без прокси заголовку верить нельзя, и адрес берётся из REMOTE_ADDR.
+RATELIMIT_CLIENT_IP_HEADER = None
+RATELIMIT_PROXY_COUNT = 1
+
+# Раз во сколько секунд фоновый поток пишет накопленные просмотры
+# (см. posts.counters); None — только явным flush().
+VIEWS_FLUSH_INTERVAL = 5
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -137,11 +165,7 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
-# STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
-if DEBUG:
-    STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
-else:
-    STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_URL = '/static/'
 
 MEDIA_URL = '/media/'
@@ -159,3 +183,10 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# журнал поисковых запросов, по которому прогревается кэш поиска
+SEARCH_QUERY_LOG = os.path.join(BASE_DIR, 'search_queries.log')
+
+# карты сайта строит команда build_sitemaps; адреса в них абсолютные
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
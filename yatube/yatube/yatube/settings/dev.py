@@ -0,0 +1,18 @@
+"""
+Development settings: DEBUG and django-debug-toolbar.
+"""
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+# Фоновые задачи выполняются сразу, без manage.py runworker.
+JOBS_EAGER = True
@@ -0,0 +1,94 @@
+"""
+Production settings.
+
+SECRET_KEY must come from the environment; DEBUG stays off
+(yatube/settings/__init__.py refuses to start otherwise).
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import (ALLOWED_HOSTS, BASE_DIR, DATABASES, MIDDLEWARE,
+                   SEARCH_QUERY_LOG, TEMPLATES)
+
+if not os.getenv('SECRET_KEY'):
+    raise ImproperlyConfigured('Задайте SECRET_KEY в переменных окружения.')
+
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split() or ALLOWED_HOSTS
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    *MIDDLEWARE[1:],
+]
+
+DATABASES['default']['CONN_MAX_AGE'] = 60
+
+# Кэш общий для всех процессов: через него расходятся сбросы кэша
+# объектов, кэшированные сессии, счётчики ограничений частоты, отметки
+# лент и журнал подсказок. Память процесса (LocMemCache) здесь не
+# годится: другой процесс не увидел бы ни сброса, ни счётчика.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('MEMCACHED_LOCATION', '127.0.0.1:11211').split(),
+    },
+}
+
+# В prod приложение стоит за обратным прокси, который дописывает адрес
+# клиента в X-Forwarded-For; пустая переменная отключает заголовок.
+RATELIMIT_CLIENT_IP_HEADER = os.getenv(
+    'RATELIMIT_CLIENT_IP_HEADER', 'HTTP_X_FORWARDED_FOR'
+) or None
+RATELIMIT_PROXY_COUNT = int(os.getenv('RATELIMIT_PROXY_COUNT', '1'))
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv(
+    'SESSION_BACKEND', 'cached_db'
+)
+
+# Шаблоны компилируются один раз на процесс и хранятся в памяти,
+# а wsgi.py прогревает их при старте (см. core.warmup).
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['debug'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATE_WARMUP = True
+
+# collectstatic пишет файлы с хэшем в имени и их сжатые копии,
+# а wsgi.py отдаёт их с заголовками immutable (см. core.static).
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+SERVE_STATIC = True
+
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SECURE_BROWSER_XSS_FILTER = True
+X_FRAME_OPTIONS = 'DENY'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'search_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SEARCH_QUERY_LOG,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'posts.search': {
+            'handlers': ['search_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,23 @@
+"""
+Test settings: no debug tooling, fast password hashing, in-memory email.
+"""
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Тесты ограничения частоты включают его сами через override_settings.
+RATELIMIT_ENABLED = False
+RATELIMIT_STORE = 'core.ratelimit.LocalStore'
+
+# Фоновые задачи выполняются сразу, без manage.py runworker.
+JOBS_EAGER = True
+
+# Тесты сбрасывают буфер просмотров сами, без фонового потока.
+VIEWS_FLUSH_INTERVAL = None
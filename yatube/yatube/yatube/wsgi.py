@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if getattr(settings, 'TEMPLATE_WARMUP', False):
+    from core.warmup import warm_templates
+    warm_templates()
+
+if getattr(settings, 'SERVE_STATIC', False):
+    from core.static import StaticFilesApplication
+    application = StaticFilesApplication(
+        application, settings.STATIC_ROOT, settings.STATIC_URL
+    )